@@ -1,5 +1,4 @@
 from mathobject import MathObject
-import config
 from config import LABEL_FONT
 from vector import Vector
 from point import Point
@@ -8,8 +7,14 @@ import numpy as np
 import tkinter as tk
 from polyline import Polyline
 from polygon import Polygon
+from pointbuffer import PointBuffer
+from ellipse import Ellipse
+from vectorarray import VectorArray
+from pointcloud import PointCloud
 
 class AffineT(MathObject):
+    __slots__ = ("_matrix", "_linear", "_translation")
+
     @staticmethod
     def identity():
         return AffineT([[1, 0, 0], [0, 1, 0]])
@@ -34,12 +39,16 @@ class AffineT(MathObject):
         [a, b, c] where c and f are the tx ty components, a, e are the scale components, b d are shear components, and a b, d e are the rotation components.
         [d, e, f]
         [0, 0, 1]
+
+        A full 3x3 matrix (whose last row is [0, 0, 1]) is accepted too.
         """
         super().__init__()
-        self._matrix = np.array([matrix[0], matrix[1], [0, 0, 1]])
+        self._matrix = np.array(matrix, dtype=np.float64)
+        if self._matrix.shape == (2, 3):
+            self._matrix = np.vstack((self._matrix, (0, 0, 1)))
         self._label = label
-        self._linear = LinearT(self._matrix[:2, :2])
-        self._translation = Vector(self._matrix[0][2], self._matrix[1][2])
+        self._linear = None # created the first time they are asked for (composing transforms shouldn't create objects that are never used)
+        self._translation = None
 
     def copy(self):
         return AffineT(self._matrix)
@@ -70,17 +79,63 @@ class AffineT(MathObject):
 
     @property
     def ihat(self):
-        return self._linear.ihat
+        return self.linear.ihat
 
     @property
     def jhat(self):
-        return self._linear.jhat
+        return self.linear.jhat
 
     @property
     def linear(self):
         """The linear transformation component of the affine transformation (i.e. excludes the translation)."""
+        if self._linear is None:
+            self._linear = LinearT(self._matrix[:2, :2])
         return self._linear
 
+    @property
+    def translation_vector(self):
+        """The translation component of the affine transformation, as a Vector."""
+        if self._translation is None:
+            self._translation = Vector(self._matrix[0, 2], self._matrix[1, 2])
+        return self._translation
+
+    def _apply_point(self, x, y):
+        """Transforms the point (x,y). Returns a plain (x,y) tuple."""
+        m = self._matrix
+        return (m[0, 0] * x + m[0, 1] * y + m[0, 2], m[1, 0] * x + m[1, 1] * y + m[1, 2])
+
+    def _apply_array(self, points):
+        """Transforms an (N,2) array of points with a single matrix multiply. Returns a new (N,2) array."""
+        return points @ self._matrix[:2, :2].T + self._matrix[:2, 2]
+
+    def apply(self, points):
+        """Transforms many points at once (with a single matrix multiply) and returns them as a new (N,2) numpy array.
+
+        'points' can be an (N,2) array, a sequence of (x,y) pairs, a Polygon, a Polyline or a PointCloud. An Ellipse
+        (e.g. Polygon.circle()) is returned as a new Ellipse instead, as it stays exact.
+        """
+        if isinstance(points, Ellipse):
+            return self * points
+        if isinstance(points, (Polygon, Polyline, PointCloud)):
+            points = points._points.array
+        return self._apply_array(PointBuffer.as_array(points))
+
+    def apply_in_place(self, shape):
+        """Transforms a Polygon, Polyline, PointCloud, Ellipse or (N,2) float array in place (no new shape is created). Returns 'shape'."""
+        if isinstance(shape, (Polygon, Polyline, PointCloud)):
+            self._transform_array_in_place(shape._points.array)
+            shape._invalidate()
+        elif isinstance(shape, Ellipse):
+            shape._matrix = self._matrix @ shape._matrix
+            shape._invalidate()
+        else:
+            self._transform_array_in_place(shape)
+        return shape
+
+    def _transform_array_in_place(self, points):
+        points[:] = points @ self._matrix[:2, :2].T
+        points += self._matrix[:2, 2]
+
     @property
     def tx(self):
         return self._matrix[0][2]
@@ -89,31 +144,35 @@ class AffineT(MathObject):
     def ty(self):
         return self._matrix[1][2]
 
-    def draw(self):
-        super().draw()
-        
+    def _compute_bounds(self):
+        xs = (self.c, self.c + self.a, self.c + self.b)
+        ys = (self.f, self.f + self.d, self.f + self.e)
+        return (min(xs), min(ys), max(xs), max(ys))
+
+    def _render(self):
         # visualize the coordinate axes of the affine transformation
 
+        transform = self._screen_transform()
         tx = self.c
         ty = self.f
-        ttransformed = config.command_interpretter.initial_transform * Vector(tx, ty)
+        ttransformed = transform._apply_point(tx, ty)
 
         ix = tx + self.a
         iy = ty + self.d
-        itransformed = config.command_interpretter.initial_transform * Vector(ix, iy)
+        itransformed = transform._apply_point(ix, iy)
         jx = tx + self.b
         jy = ty + self.e
-        jtransformed = config.command_interpretter.initial_transform * Vector(jx, jy)
+        jtransformed = transform._apply_point(jx, jy)
 
-        l1 = self._canvas.create_line(ttransformed[0], ttransformed[1], itransformed[0], itransformed[1], fill=self._color, arrow=tk.LAST,width=self.line_width)
-        l2 = self._canvas.create_line(ttransformed[0], ttransformed[1], jtransformed[0], jtransformed[1], fill=self._color, arrow=tk.LAST,width=self.line_width)
+        l1 = self._canvas.create_line(ttransformed[0], ttransformed[1], itransformed[0], itransformed[1], fill=self.color, arrow=tk.LAST,width=self.line_width)
+        l2 = self._canvas.create_line(ttransformed[0], ttransformed[1], jtransformed[0], jtransformed[1], fill=self.color, arrow=tk.LAST,width=self.line_width)
         self._canvas_items.append(l1)
         self._canvas_items.append(l2)
         i1 = self._canvas.create_text(
-            itransformed[0], itransformed[1], text="i", font=LABEL_FONT, fill=self._color
+            itransformed[0], itransformed[1], text="i", font=LABEL_FONT, fill=self.color
         )
         i2 = self._canvas.create_text(
-            jtransformed[0], jtransformed[1], text="j", font=LABEL_FONT, fill=self._color
+            jtransformed[0], jtransformed[1], text="j", font=LABEL_FONT, fill=self.color
         )
         self._canvas_items.append(i1)
         self._canvas_items.append(i2)
@@ -124,7 +183,7 @@ class AffineT(MathObject):
                 ttransformed[1],
                 text=self._label,
                 font=LABEL_FONT,
-                fill=self._color,
+                fill=self.color,
             )
             self._canvas_items.append(t)
 
@@ -135,7 +194,7 @@ class AffineT(MathObject):
 
         # matrix list/tuple multiplication (transform list/tuple representation of points)
         if isinstance(other, (list, tuple)):
-            return self * Vector(other[0], other[1])
+            return Vector(*self._apply_point(other[0], other[1]))
 
         # matrix vector multiplication (transform vector)
         if isinstance(other, Vector):
@@ -153,11 +212,23 @@ class AffineT(MathObject):
 
         # matrix polygon multiplication (transform polygon)
         if isinstance(other, Polygon):
-            return Polygon([self * point for point in other._points])
+            return Polygon(self.apply(other))
 
         # matrix polyline multiplication (transform polyline)
         if isinstance(other, Polyline):
-            return Polyline([self * point for point in other._points])
+            return Polyline(self.apply(other))
+
+        # matrix ellipse multiplication (transform ellipse, the result is still an exact ellipse)
+        if isinstance(other, Ellipse):
+            return Ellipse._from_matrix(self._matrix @ other._matrix, other._start, other._extent)
+
+        # matrix point cloud multiplication (transform every point)
+        if isinstance(other, PointCloud):
+            return other._with(self.apply(other))
+
+        # matrix vector array multiplication (transform the tails as points, and the components by the linear part)
+        if isinstance(other, VectorArray):
+            return other._with(other._components @ self._matrix[:2, :2].T, self._apply_array(other._positions))
 
         return NotImplemented
 
@@ -0,0 +1,355 @@
+import argparse
+import functools
+import gc
+import itertools
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+
+description = """Times the hot paths of the program (transforming and creating shapes, growing polylines, redrawing the
+scene, drawing the grid, computing autocompletions) with a RecordingCanvas instead of a Tk canvas, so no
+display is needed. Reports operations per second, peak memory and canvas calls per operation, can save the results as
+JSON, and can compare them against previously saved results (a baseline) to show regressions."""
+
+DEFAULT_MIN_TIME = 1.0 # seconds each benchmark is timed for (at least)
+MEMORY_RUNS = 10 # number of operations run while measuring peak memory
+DEFAULT_TOLERANCE = 0.2 # fraction by which a result can be worse than the baseline before it counts as a regression
+MEMORY_SLACK = 64 * 1024 # peak memory differences below this many bytes are never regressions (allocator noise)
+
+BENCHMARKS = [] # (name, setup) pairs. setup(command_interpretter) prepares the benchmark and returns a function that performs one operation
+
+def benchmark(name, setup):
+    BENCHMARKS.append((name, setup))
+
+
+# -- benchmarks --
+
+def _random_points(n, extent=8):
+    return [(random.uniform(-extent, extent), random.uniform(-extent, extent)) for _ in range(n)]
+
+def _transform_polygon_setup(command_interpretter, n):
+    from affinet import AffineT
+    from polygon import Polygon
+
+    transform = AffineT.rotation(30) @ AffineT.scaling(2, 3) @ AffineT.translation(1, -1)
+    polygon = Polygon(_random_points(n))
+    return lambda: transform * polygon
+
+def _compose_setup(command_interpretter):
+    from affinet import AffineT
+
+    rotation = AffineT.rotation(30)
+    return lambda: AffineT.translation(1, 2) @ AffineT.scaling(2, 3) @ rotation
+
+def _circle_setup(command_interpretter):
+    from polygon import Polygon
+
+    return lambda: Polygon.circle(1, 2, 3)
+
+def _draw_circle_setup(command_interpretter, r):
+    from polygon import Polygon
+
+    circle = Polygon.circle(0, 0, r)
+    circle.draw()
+    command_interpretter.flush()
+    return circle.redraw
+
+def _draw_dense_polyline_setup(command_interpretter, n, grid_size, lod_tolerance):
+    import numpy as np
+    from polyline import Polyline
+
+    # a long random walk (e.g. recorded data), drawn at a zoom level (grid_size) where many of its points share a pixel
+    command_interpretter.grid_size = grid_size
+    command_interpretter.lod_tolerance = lod_tolerance
+    polyline = Polyline(np.cumsum(np.random.default_rng(0).normal(0, 0.05, (n, 2)), axis=0))
+    polyline.draw()
+    command_interpretter.flush()
+    return polyline.redraw
+
+def _polyline_add_setup(command_interpretter, n):
+    from polyline import Polyline
+
+    # a drawn trail that already has n points; every operation adds one more (like an animation leaving a trail)
+    polyline = Polyline(_random_points(n))
+    polyline.draw()
+    command_interpretter.flush()
+    return lambda: polyline.add((random.uniform(-8, 8), random.uniform(-8, 8)))
+
+def _bounded_polyline_add_setup(command_interpretter, max_points, tolerance):
+    from polyline import Polyline
+
+    # a drawn trail that keeps its last max_points points, following a circle (so that with a tolerance, most points
+    # are merged into the last segment)
+    polyline = Polyline(max_points=max_points, tolerance=tolerance)
+    polyline.draw()
+    command_interpretter.flush()
+    angles = itertools.count(0, 0.01)
+
+    def add():
+        angle = next(angles)
+        polyline.add((5 * math.cos(angle), 5 * math.sin(angle)))
+    return add
+
+def _redraw_setup(command_interpretter, n):
+    from vector import Vector
+    from point import Point
+    from polygon import Polygon
+
+    # a mix of objects, mostly in view
+    for i, (x, y) in enumerate(_random_points(n, extent=12)):
+        if i % 3 == 0:
+            obj = Vector(x, y)
+        elif i % 3 == 1:
+            obj = Point(x, y)
+        else:
+            obj = Polygon.triangle(x, y, 1, 1)
+        obj.draw()
+    command_interpretter.flush()
+
+    def run():
+        command_interpretter.redraw()
+
+    return run
+
+def _point_cloud_setup(command_interpretter, n):
+    import numpy as np
+    from pointcloud import PointCloud
+
+    rng = np.random.default_rng(0)
+    cloud = PointCloud(rng.normal(0, 4, (n, 2)), colors=rng.integers(0, 256, (n, 3)), size=4)
+    cloud.draw()
+    command_interpretter.flush()
+    return cloud.redraw
+
+def _vector_array_setup(command_interpretter, n):
+    import numpy as np
+    from affinet import AffineT
+    from vectorarray import VectorArray
+
+    rng = np.random.default_rng(0)
+    field = VectorArray(rng.normal(0, 1, (n, 2)), rng.normal(0, 4, (n, 2)))
+    transform = AffineT.rotation(10)
+    return lambda: (transform * (2 * field + field)).dot(field)
+
+def _rotate_node_setup(command_interpretter, n):
+    from affinet import AffineT
+    from node import Node
+    from polygon import Polygon
+
+    node = Node()
+    for x, y in _random_points(n):
+        node.add(Polygon.square(x, y, 0.5))
+    node.draw()
+    command_interpretter.flush()
+    angles = iter(range(sys.maxsize))
+
+    def run():
+        node.transform = AffineT.rotation(next(angles))
+        command_interpretter.flush()
+
+    return run
+
+def _draw_grid_setup(command_interpretter, grid_size):
+    command_interpretter._grid_size = grid_size
+    command_interpretter._update_transform()
+    command_interpretter.draw_grid()
+    return command_interpretter.draw_grid
+
+def _execute_script_setup(command_interpretter, cells):
+    # a script of 'cells' cells that each make a polygon of 1000 points (some work), then only the last one is edited
+    text = "".join(
+        f"# cell {i}\n# ======\np{i} = Polygon(AffineT.rotation({i}).apply(np.random.default_rng({i}).normal(0, 4, (1000, 2))))\ndraw(p{i})\n\n"
+        for i in range(cells)
+    )
+    command_interpretter.execute_script(text)
+    counter = iter(range(sys.maxsize))
+    return lambda: command_interpretter.execute_script(f"{text}# last\n# ====\ndraw(Point({next(counter) % 10}, 0))\n")
+
+JEDI_SCRIPT = """v = Vector(1, 2)
+T = AffineT.rotation(45) @ AffineT.scaling(2, 1)
+w = T * v
+w.draw()
+p = Polygon.circle(0, 0, 3)
+"""
+
+@functools.lru_cache(maxsize=None)
+def _completion_engine():
+    from completionengine import CompletionEngine
+
+    engine = CompletionEngine()
+    engine.complete(JEDI_SCRIPT + "v.", JEDI_SCRIPT.count("\n") + 1, 2) # the first completion is slow (jedi loads its caches)
+    return engine
+
+def _completion_setup(command_interpretter, changing_text):
+    engine = _completion_engine()
+    line = JEDI_SCRIPT.count("\n") + 2 # the line of 'w.'
+
+    if not changing_text:
+        text = f"{JEDI_SCRIPT}x = 1\nw."
+        engine.complete(text, line, 2)
+        return lambda: engine.complete(text, line, 2)
+
+    # every operation is a keypress: the text changes, so the script is analysed again
+    counter = iter(range(sys.maxsize))
+    return lambda: engine.complete(f"{JEDI_SCRIPT}x{next(counter)} = 1\nw.", line, 2)
+
+for _n in (4, 1000, 100000):
+    benchmark(f"AffineT * Polygon [{_n} points]", functools.partial(_transform_polygon_setup, n=_n))
+benchmark("Polygon.circle", _circle_setup)
+for _r in (0.1, 5, 100):
+    benchmark(f"Polygon.circle draw [radius {_r}]", functools.partial(_draw_circle_setup, r=_r))
+for _n in (1000, 100000):
+    benchmark(f"Polyline.add [trail of {_n} points]", functools.partial(_polyline_add_setup, n=_n))
+for _grid_size, _lod_tolerance in ((30, 1), (1, 0), (1, 1)):
+    benchmark(
+        f"Polyline draw [100000 points, grid size {_grid_size}, lod tolerance {_lod_tolerance}]",
+        functools.partial(_draw_dense_polyline_setup, n=100000, grid_size=_grid_size, lod_tolerance=_lod_tolerance),
+    )
+for _tolerance in (None, 0.01):
+    benchmark(f"Polyline.add [trail of max 1000 points, tolerance {_tolerance}]", functools.partial(_bounded_polyline_add_setup, max_points=1000, tolerance=_tolerance))
+for _n in (10, 100, 1000):
+    benchmark(f"CommandInterpretter.redraw [{_n} objects]", functools.partial(_redraw_setup, n=_n))
+benchmark("PointCloud draw [10000 points]", functools.partial(_point_cloud_setup, n=10000))
+benchmark("VectorArray arithmetic + AffineT [10000 vectors]", functools.partial(_vector_array_setup, n=10000))
+benchmark("Node rotation + flush [300 children]", functools.partial(_rotate_node_setup, n=300))
+for _grid_size in (1, 30, 300):
+    benchmark(f"CommandInterpretter.draw_grid [grid size {_grid_size}]", functools.partial(_draw_grid_setup, grid_size=_grid_size))
+for _cells in (1, 50):
+    benchmark(f"CommandInterpretter.execute_script [{_cells} cells, last one edited]", functools.partial(_execute_script_setup, cells=_cells))
+benchmark("CompletionEngine.complete [cached]", functools.partial(_completion_setup, changing_text=False))
+benchmark("CompletionEngine.complete [text changed]", functools.partial(_completion_setup, changing_text=True))
+
+
+# -- running and reporting --
+
+def _new_command_interpretter():
+    from recordingcanvas import RecordingCanvas
+    from commandinterpretter import CommandInterpretter
+
+    return CommandInterpretter(RecordingCanvas(800, 600))
+
+def measure(setup, min_time):
+    """Runs a benchmark. Returns a dict with its operations per second, peak memory (bytes) and canvas calls per operation."""
+    # run the setup once first, so one-time costs (importing modules, filling caches) aren't measured
+    random.seed(0)
+    setup(_new_command_interpretter())
+
+    # peak memory of setting up and running a few operations (tracemalloc slows things down, so this is a separate run)
+    random.seed(0)
+    tracemalloc.start()
+    run = setup(_new_command_interpretter())
+    for _ in range(MEMORY_RUNS):
+        run()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    random.seed(0)
+    command_interpretter = _new_command_interpretter()
+    run = setup(command_interpretter)
+    canvas = command_interpretter._canvas
+    canvas.reset_calls()
+
+    # time batches of operations (sized to take about a tenth of min_time each) until min_time has passed
+    operations = 0
+    elapsed = 0.0
+    batch = 1
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        while elapsed < min_time:
+            start = time.perf_counter()
+            for _ in range(batch):
+                run()
+            batch_time = time.perf_counter() - start
+            operations += batch
+            elapsed += batch_time
+            batch = max(1, min(batch * 10, int(batch * min_time / 10 / max(batch_time, 1e-9))))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    return {
+        "ops_per_sec": operations / elapsed,
+        "peak_memory": peak_memory,
+        "canvas_calls_per_op": sum(canvas.calls.values()) / operations,
+    }
+
+def compare(result, baseline, tolerance):
+    """Returns a description of how 'result' compares to 'baseline' (the same benchmark's saved result), and whether it is a regression."""
+    speed = result["ops_per_sec"] / baseline["ops_per_sec"]
+    memory_growth = result["peak_memory"] - baseline["peak_memory"]
+    slower = speed < 1 - tolerance
+    bigger = memory_growth > MEMORY_SLACK and result["peak_memory"] > baseline["peak_memory"] * (1 + tolerance)
+    notes = [f"{speed:.2f}x speed"]
+    if slower:
+        notes.append("SLOWER")
+    if bigger:
+        notes.append(f"MORE MEMORY (was {_format_bytes(baseline['peak_memory'])})")
+    return ", ".join(notes), slower or bigger
+
+def _format_bytes(n):
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("-k", "--filter", help="only run benchmarks whose name contains this text")
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME, help="seconds to time each benchmark for")
+    parser.add_argument("-o", "--output", help="save the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against the results saved in this JSON file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="how much slower (or bigger) than the baseline a result can be before it is reported as a regression (0.2 = 20%%)",
+    )
+    parser.add_argument("-l", "--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args()
+
+    selected = [(name, setup) for name, setup in BENCHMARKS if args.filter is None or args.filter.lower() in name.lower()]
+    if args.list:
+        for name, _ in selected:
+            print(name)
+        sys.exit(0)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)["results"]
+
+    results = {}
+    regressions = []
+    name_width = max((len(name) for name, _ in selected), default=0)
+    print(f"{'benchmark':<{name_width}}  {'ops/sec':>12}  {'peak memory':>11}  {'canvas calls/op':>15}")
+    for name, setup in selected:
+        result = measure(setup, args.min_time)
+        results[name] = result
+        line = f"{name:<{name_width}}  {result['ops_per_sec']:>12,.1f}  {_format_bytes(result['peak_memory']):>11}  {result['canvas_calls_per_op']:>15,.1f}"
+        if name in baseline:
+            note, regressed = compare(result, baseline[name], args.tolerance)
+            line += f"  ({note})"
+            if regressed:
+                regressions.append(name)
+        print(line, flush=True)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                {"python": platform.python_version(), "platform": platform.platform(), "time": time.strftime("%Y-%m-%d %H:%M:%S"), "results": results},
+                f,
+                indent=2,
+            )
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) compared to {args.baseline}:")
+        for name in regressions:
+            print(f"  {name}")
+        sys.exit(1)
@@ -0,0 +1,215 @@
+import ast
+import re
+import difflib
+import functools
+
+HEADER = re.compile(r"#\s*={3,}\s*$") # a line of '='s, under a comment line that is the cell's title
+
+class Cell:
+    """A part of a script that can be re-run by itself (see CommandInterpretter.execute_script()).
+
+    Scripts are split into cells at headers: a comment line followed by a '# ====' line, like the titles of the
+    examples. A cell knows which global names it binds, changes (e.g. 'v.angle = 30', 'p.add(q)') and reads, so that
+    when the script is re-run, only the cells that changed (and the cells affected by them) have to run again. Calling
+    one of the script's functions counts as reading (and changing) what the function reads (and changes), and as
+    changing the arguments passed to it.
+    """
+
+    __slots__ = ("source", "first_line", "binds", "mutates", "reads", "calls", "functions", "objects", "values", "done")
+
+    def __init__(self, source, first_line=1):
+        self.source = source
+        self.first_line = first_line # line number of the cell's first line in the script
+        self.binds, self.mutates, self.reads, self.calls, self.functions = Cell._names(source)
+        self.objects = [] # the MathObjects the cell drew (kept alive as long as the cell's results are kept)
+        self.values = {} # the values the cell bound to its names, when it last ran
+        self.done = False # whether the cell ran (to the end)
+
+    @property
+    def code(self):
+        """The compiled cell (code objects are cached, so unchanged cells are only compiled once)."""
+        return Cell._compile(self.source, self.first_line)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _compile(source, first_line):
+        tree = ast.parse(source, "<script>")
+        ast.increment_lineno(tree, first_line - 1) # (so errors report the line number in the whole script)
+        return compile(tree, "<script>", "exec")
+
+    @staticmethod
+    def split(text):
+        """Splits a script into Cells (raises SyntaxError if the script isn't valid Python)."""
+        lines = text.split("\n")
+        starts = [0]
+        for i in range(1, len(lines)):
+            if HEADER.match(lines[i]) and lines[i - 1].startswith("#") and not HEADER.match(lines[i - 1]) and i - 1 > starts[-1]:
+                starts.append(i - 1)
+        starts.append(len(lines))
+        cells = [Cell("\n".join(lines[start:end]), start + 1) for start, end in zip(starts, starts[1:])]
+
+        # a header can be inside a block (e.g. a comment at column 0 in a function), then the script is one cell
+        try:
+            for cell in cells:
+                cell.code
+        except SyntaxError:
+            cells = [Cell(text)]
+            cells[0].code
+        return cells
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _names(source):
+        """Returns the (binds, mutates, reads, calls, functions) of the code 'source': the frozensets of global names it
+        binds, changes and reads, the frozenset of (function, argument) name pairs of the calls it makes (e.g.
+        ('grow', 'v') for 'grow(v)'), and a tuple of the (name, mutates, reads, calls) of the functions and classes it
+        defines (what calling them changes, reads and calls).
+        """
+        binds = set()
+        cell = (set(), set(), set()) # mutates, reads, calls of the cell itself
+        functions = {} # name -> (mutates, reads, calls) of the top level functions and classes
+
+        def root(node):
+            # 'a' for 'a.b[0].c'
+            while isinstance(node, (ast.Attribute, ast.Subscript)):
+                node = node.value
+            return node.id if isinstance(node, ast.Name) else None
+
+        def visit(node, top, scopes):
+            # 'top' is False inside functions, classes, lambdas and comprehensions (names bound there are local).
+            # 'scopes' are the cell's names, then those of the top level function the node is in (if any): every read
+            # counts for the cell, changes and calls only count for the innermost scope
+            mutates = scopes[-1][0] if top or len(scopes) > 1 else set()
+            calls = scopes[-1][2]
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                if top:
+                    binds.add(node.name)
+                    scopes = scopes + (functions.setdefault(node.name, (set(), set(), set())),)
+                top = False
+            elif top and isinstance(node, ast.Assign) and isinstance(node.value, ast.Lambda) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+                # 'f = lambda ...: ...' defines a function too
+                visit(node.targets[0], top, scopes)
+                visit(node.value, False, scopes + (functions.setdefault(node.targets[0].id, (set(), set(), set())),))
+                return
+            elif isinstance(node, (ast.Lambda, ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp)):
+                top = False
+            elif isinstance(node, ast.Global):
+                binds.update(node.names)
+            elif isinstance(node, ast.Name):
+                if isinstance(node.ctx, ast.Load):
+                    for scope in scopes:
+                        scope[1].add(node.id)
+                elif top:
+                    binds.add(node.id)
+            elif isinstance(node, (ast.Import, ast.ImportFrom)) and top:
+                binds.update((alias.asname or alias.name).split(".")[0] for alias in node.names if alias.name != "*")
+            elif isinstance(node, (ast.Attribute, ast.Subscript)) and not isinstance(node.ctx, ast.Load):
+                mutates.add(root(node))
+            elif isinstance(node, ast.AugAssign):
+                mutates.add(root(node.target))
+            elif isinstance(node, ast.Expr) and isinstance(node.value, ast.Call) and isinstance(node.value.func, ast.Attribute):
+                # a method called for its effect probably changes its object or arguments (e.g. 'p.add(q)', 'T.apply_in_place(p)')
+                mutates.add(root(node.value.func.value))
+                mutates.update(root(arg) for arg in node.value.args)
+            if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+                # (whether the function changes its arguments depends on whether it is one of the script's, see plan())
+                arguments = node.args + [keyword.value for keyword in node.keywords]
+                calls.update((node.func.id, root(arg)) for arg in arguments if root(arg) is not None)
+            for child in ast.iter_child_nodes(node):
+                visit(child, top, scopes)
+
+        visit(ast.parse(source), True, (cell,))
+        for (mutates, reads, calls) in (cell, *functions.values()):
+            mutates.discard(None)
+        return (
+            frozenset(binds),
+            frozenset(cell[0]),
+            frozenset(cell[1]),
+            frozenset(cell[2]),
+            tuple((name, frozenset(f[0]), frozenset(f[1]), frozenset(f[2])) for name, f in functions.items()),
+        )
+
+    @staticmethod
+    def _effects(cells):
+        """Returns the (mutates, reads) sets of each cell, including what the script's functions it calls (directly or
+        through other functions) change and read. Arguments passed to the script's functions count as changed, since
+        a function can change them (e.g. 'grow(v)').
+        """
+        functions = {} # name -> (mutates, reads, calls), of every definition of the name in the script
+        for cell in cells:
+            for name, mutates, reads, calls in cell.functions:
+                f = functions.setdefault(name, (set(), set(), set()))
+                f[0].update(mutates)
+                f[1].update(reads)
+                f[2].update(calls)
+
+        effects = []
+        for cell in cells:
+            mutates, reads, calls = set(cell.mutates), set(cell.reads), set(cell.calls)
+            todo = [name for name in reads if name in functions]
+            seen = set()
+            while todo:
+                name = todo.pop()
+                if name in seen:
+                    continue
+                seen.add(name)
+                f = functions[name]
+                mutates |= f[0]
+                reads |= f[1]
+                calls |= f[2]
+                todo.extend(name for name in f[1] if name in functions)
+            mutates.update(argument for function, argument in calls if function in functions)
+            effects.append((mutates, reads))
+        return effects
+
+    @staticmethod
+    def plan(old_cells, new_cells):
+        """Decides which of 'new_cells' have to run, given that 'old_cells' ran before.
+
+        New cells that are unchanged from an old cell take over its state (drawn objects and values). A cell has to run
+        if it is new or changed, if it uses or rebinds a name that a cell that runs (or was removed) before it binds,
+        or if it is the last cell before a running cell that binds a name the running cell changes (so the running cell
+        changes fresh objects rather than changing them twice). What a cell uses and changes includes what the script's
+        functions it calls use and change (see _effects()). Returns a list of bools and the set of names bound by
+        the old cells that don't exist anymore or will run again.
+        """
+        old_keys = [cell.source.rstrip() if cell.done else cell for cell in old_cells] # (cells that didn't run never match)
+        new_keys = [cell.source.rstrip() for cell in new_cells] # (blank lines at the end of a cell don't count as a change)
+        changed = set()
+        stale = {} # new cell index -> names of removed old cells (or old versions of changed cells) at that position
+        for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old_keys, new_keys, autojunk=False).get_opcodes():
+            if tag == "equal":
+                for old, new in zip(old_cells[i1:i2], new_cells[j1:j2]):
+                    new.objects, new.values, new.done = old.objects, old.values, True
+                continue
+            changed.update(range(j1, j2))
+            for old in old_cells[i1:i2]:
+                stale.setdefault(j1, set()).update(old.binds)
+        stale_names = set().union(*stale.values())
+        effects = Cell._effects(new_cells)
+
+        while True:
+            run = []
+            dirty = set()
+            for i, cell in enumerate(new_cells):
+                dirty |= stale.get(i, set())
+                mutates, reads = effects[i]
+                r = i in changed or not dirty.isdisjoint(reads | cell.binds | mutates)
+                if r:
+                    dirty |= cell.binds
+                run.append(r)
+
+            upstream = set()
+            for i, cell in enumerate(new_cells):
+                if not run[i]:
+                    continue
+                for name in effects[i][0] - cell.binds:
+                    binders = [j for j in range(i) if name in new_cells[j].binds]
+                    if binders and not run[binders[-1]]:
+                        upstream.add(binders[-1])
+            if not upstream:
+                for i, cell in enumerate(new_cells):
+                    if run[i]:
+                        stale_names |= cell.binds
+                return run, stale_names
+            changed |= upstream
@@ -1,9 +1,10 @@
 import tkinter as tk
-from jedi import Script
+import re
 from completions import Completions
-import timeit
+from completionengine import CompletionEngine
 
 FONT = ("Consolas", 11)
+COMPLETION_POLL_INTERVAL = 15 # milliseconds between checks for the results of a completion request
 
 class CodeEditor(tk.Frame):
     """Represents the GUI where the user types commands, presses buttons to run commands, etc. Basically the left side of the main gui."""
@@ -16,19 +17,12 @@ class CodeEditor(tk.Frame):
         self._ctrl_button_pressed = False
         self._ctrl_button_pressed_immediate = False
         self._shift_button_pressed_immediate = False
-        self._jedi_script_cache = {} # cache jedi scripts so we don't have to re-parse the script every time the user presses a key
-        self._jedi_script_cache_size = 100 
         self._completions_up = False
-
-        # combine script window text with command interpretter text (to provide it with context)
-        with open('commandinterpretter.py', 'r') as f:
-            self._command_interpretter_text = f.read()
-        self._completion_offset = self._command_interpretter_text.count('\n') + 2 # +2 for two lines that are added
+        self._completion_engine = CompletionEngine() # computes completions on a background thread, so typing never waits for jedi
+        self._completion_request = None # id of the completion request that is being waited for
 
         self.create_widgets()
 
-        self.get_jedi_script() # calling this once here improves speed (first instance of jedi.Script() instantiation is slow, thus we do it during startup as opposed to during first autocomplete request)
-
     def create_widgets(self):
         pane = tk.PanedWindow(self, orient=tk.VERTICAL, sashrelief=tk.RAISED,sashwidth=10,sashpad=1)
         pane.pack(fill=tk.BOTH, expand=True)
@@ -43,6 +37,7 @@ class CodeEditor(tk.Frame):
         self._script_text.pack(fill=tk.BOTH, expand=True)
 
         initial_text = """# Type script here. Press 'shift + enter' to run.
+# Only the cells (parts under '# ====' headers) that changed run again, press 'ctrl + shift + enter' to run everything.
 # Press 'ctrl + space' to show completions.
 
 T = AffineT([[2,-2,3],[2,2,5]])
@@ -82,9 +77,7 @@ a.color = 'red'"""
         self._immediate_text.bind("<space>", self._on_space_pressed_immediate)
 
     def show_completions(self):
-        """Called when the user presses ctrl + space."""
-
-        jedi_script = self.get_jedi_script()
+        """Called when the user presses ctrl + space (or types a dot). Asks for completions in the background; they are shown once they are ready."""
 
         # get position of cursor in script window
         line, col = self._script_text.index(tk.INSERT).split(".")
@@ -92,14 +85,29 @@ a.color = 'red'"""
         col = int(col)
         self._completions_initial_cursor_pos = (line, col)
 
-        completions = jedi_script.complete(line + self._completion_offset, col)
-        completions = [c for c in completions if not c.name.startswith('_')]
+        text = self._script_text.get("1.0", tk.END)
+        first_request = self._completion_request is None
+        self._completion_request = self._completion_engine.request(text, line, col)
+        if first_request:
+            self.after(COMPLETION_POLL_INTERVAL, self._poll_completions)
+
+    def _poll_completions(self):
+        """Checks whether the requested completions are ready (and shows them if they are)."""
+        if self._completion_request is None:
+            return # cancelled
+        result = self._completion_engine.poll()
+        if result is None:
+            self.after(COMPLETION_POLL_INTERVAL, self._poll_completions)
+            return
+        self._completion_request = None
 
-        # get completion names
-        completion_names = [c.name for c in completions]
+        # the user may have moved away while the completions were being computed
+        line, col = map(int, self._script_text.index(tk.INSERT).split("."))
+        if line != self._completions_initial_cursor_pos[0] or col < self._completions_initial_cursor_pos[1]:
+            return
 
         # show completions
-        self._completions.set_completions(completion_names)
+        self._completions.set_completions(result[1])
 
         # show completions widget at cursor position
         xpos, ypos, w, h = self._script_text.bbox(tk.INSERT)
@@ -107,6 +115,15 @@ a.color = 'red'"""
         self._completions.place(x=xpos, y=ypos+h)
         self._completions_up = True
         self._completions.set_filter('')
+        self._filter_completions() # (the user may have typed more while waiting)
+
+    def _cancel_completions(self):
+        """Hides the completions and drops any request for them."""
+        if self._completion_request is not None:
+            self._completion_engine.cancel()
+            self._completion_request = None
+        self._completions.place_forget()
+        self._completions_up = False
 
     def on_complete_immediate(self, event):
         """Called when the user presses ctrl + space."""
@@ -114,8 +131,7 @@ a.color = 'red'"""
         print("on_complete_immediate")
 
     def _on_escape_pressed(self, event):
-        self._completions.place_forget()
-        self._completions_up = False
+        self._cancel_completions()
 
     def _on_key_pressed(self, event):
         # most logic is schedule to be done during idle (gives a chance for the Text widget to handle the key press first)
@@ -124,16 +140,15 @@ a.color = 'red'"""
         if event.char == '.':
             self.after_idle(self.show_completions)
 
-        # if auto completion window is up, typing filters it
-        if self._completions_up:
-            if (not event.char.isalnum()) and (event.char != '\x08'): # backspace
-                self._completions.place_forget()
-                self._completions_up = False
-            else:
+        # if auto completion window is up (or about to be), typing filters it
+        if self._completions_up or self._completion_request is not None:
+            if (not event.char.isalnum()) and (event.char != '\x08') and (event.char != '.'): # backspace
+                self._cancel_completions()
+            elif self._completions_up:
                 self.after_idle(self._filter_completions)
 
     def _filter_completions(self):
-        """Filters the completions window based on the text between the cursor and the dot to the left of it."""
+        """Filters the completions window based on the name (or part of a name) to the left of the cursor."""
         line,col = self._script_text.index(tk.INSERT).split(".")
         line = int(line)
         col = int(col)
@@ -143,9 +158,7 @@ a.color = 'red'"""
             return
 
         cursor_line = self._script_text.get("insert linestart", "insert")
-        dot_location = cursor_line.rfind('.')
-        if dot_location != -1:
-            filter = cursor_line[dot_location+1:]
+        filter = re.search(r"\w*$", cursor_line).group() # (the text after the dot, or the start of the name being typed)
         self._completions.set_filter(filter)
 
     def _on_ctrl_key_pressed(self, event):
@@ -197,35 +210,26 @@ a.color = 'red'"""
     def _on_return_key_pressed(self, event):
         if self._shift_button_pressed:
             the_text = self._script_text.get("1.0", tk.END)
-            self.on_execute_script(the_text)
+            self.on_execute_script(the_text, restart=self._ctrl_button_pressed)
             return "break" # prevent the event from propagating (i.e. "handled")
 
     def _on_shift_key_released(self, event):
         self._shift_button_pressed = False
 
-    def on_execute_script(self, text):
-        """Called when the user presses the run button or shift + enter in the script window."""
+    def on_execute_script(self, text, restart=False):
+        """Called when the user presses the run button or shift + enter in the script window ('restart' is True for ctrl + shift + enter)."""
         pass # callback for client
 
     def on_run_immediate(self, text):
         """Called when the user presses shift + enter in the immediate text box."""
         pass
 
-    def get_jedi_script(self):
-        """Effeciently retrieves a jedi Script object for the current text in the script window. Uses a cached version if possible."""
-
-        # get text from script window
-        text = self._script_text.get("1.0", tk.END)
+    def warm_up(self):
+        """Gets the first completion, which is slow (jedi is imported and loads its caches), out of the way in the
+        background. Called once the window is shown, so that it doesn't slow down startup.
+        """
+        self._completion_engine.request("", 1, 0)
 
-        # if the text is cached, return the cached version
-        if text in self._jedi_script_cache:
-            return self._jedi_script_cache[text]
-
-        # create a new jedi Script object for this text, cache it, and return it
-        # if cache is full, remove the oldest entry
-        if len(self._jedi_script_cache) >= self._jedi_script_cache_size:
-            self._jedi_script_cache.popitem(last=False)
-        all_text = f'{self._command_interpretter_text}\n\n{text}'
-        jedi_script = Script(all_text)
-        self._jedi_script_cache[text] = jedi_script
-        return jedi_script
\ No newline at end of file
+    def get_jedi_script(self):
+        """Returns a jedi Script object for the current text in the script window (analysed against the script namespace stub, see CompletionEngine)."""
+        return self._completion_engine.script(self._script_text.get("1.0", tk.END))
\ No newline at end of file
@@ -3,46 +3,84 @@ import numpy as np
 import config
 import math
 import time
+import gc
+import collections
 
+from mathobject import MathObject
 from vector import Vector
 from point import Point
 from polyline import Polyline
 from polygon import Polygon
+from ellipse import Ellipse
+from node import Node
+from vectorarray import VectorArray
+from pointcloud import PointCloud
 from lineart import LinearT
 from affinet import AffineT
+from spatialindex import SpatialIndex
+from cell import Cell
+from profiler import Profiler
+from draghandles import DragHandles
 
 from utilities import *
 
+MIN_GRID_SPACING = 10 # minimum distance between drawn grid lines, in pixels (lines are thinned out when zoomed far out)
+ZOOM_STEP = 1.1 # zoom factor per mouse wheel notch
+MIN_GRID_SIZE = 1 # limits of zooming (grid_size), in pixels
+MAX_GRID_SIZE = 5000
+ZOOM_SETTLE_DELAY = 150 # milliseconds after the last mouse wheel event before objects are fully redrawn at the new zoom
+VIEW_MARGIN = 50 # objects within this many pixels of the edge of the view are drawn too (so labels, arrow heads, etc near the edge show)
+INDEX_CELL_SIZE = 4 # size of the cells of the spatial index of drawn objects, in grid units
+GROWTH_SAMPLE_INTERVAL = 1 # seconds between the samples of the growth detector (see watch_growth)
+GROWTH_SAMPLES = 10 # the growth detector warns when a count grew from each sample to the next, this many times in a row
+
 class CommandInterpretter:
     """Runs commands, keeps track of variables, allows manipulation of variables, etc."""
 
-    def __init__(self, canvas: tk.Canvas):
-        """'canvas' is the canvas that will be drawn on."""
-        self.math_objects = []
+    def __init__(self, canvas: tk.Canvas = None):
+        """'canvas' is the canvas that will be drawn on. If it is None, a HeadlessCanvas is used (so no display is needed)."""
+        if canvas is None:
+            from headlesscanvas import HeadlessCanvas
+            canvas = HeadlessCanvas()
+        self.math_objects = {} # the drawn MathObjects, by id (in the order they were drawn). Only draw() adds objects, so intermediate results (e.g. 'T * v') never get in here
         self._canvas = canvas
         config.command_interpretter = self
         self._globals = {}
         self._grid_size = 30 # equivalent to scale (zoom), in pixels
-        self._grid_offset = (
-            self._grid_size * 10
-        )  # IMPORTANT: must be a multiple of grid_size (maybe can remove this constraint later)
-        self._initial_transform = (
-            AffineT.identity()
-            @ AffineT.translation(self._grid_offset, self._grid_offset)
-            @ AffineT.scaling(self._grid_size, self._grid_size)
-        )
+        self._origin = (self._grid_size * 10, self._grid_size * 10) # position of the grid's origin on the canvas
+        self.drag_handles = DragHandles() # the points of the drawn objects that can be dragged with the left mouse button
+        self._update_transform()
+        self._zoom_settle_job = None # pending after() call that redraws everything once zooming stops
+        self._view_rect = None # cached result of view_rect()
+        self._index = SpatialIndex(INDEX_CELL_SIZE) # bounds of the drawn objects, by id
+        self._shown = set() # ids of the indexed objects that were in view at the last visibility update (i.e. have canvas items)
         self._fps = 30
         self._show_grid = True
+        self._grid_lines = ([], []) # pools of (vertical, horizontal) grid line items, repositioned by draw_grid()
+        self._grid_axes = None # (vertical, horizontal) axis line items
+        self._dirty = {} # MathObjects (by id) that changed since the last flush() and need to be redrawn
+        self._immediate_redraw = False # if True, changed objects are redrawn right away instead of at the end of the frame
+        self._lod_tolerance = config.LOD_TOLERANCE # (see MathObject._decimated())
+        self._cells = [] # the cells of the script, as of the last execute_script()
+        self._running_cell = None # the cell being executed (it is told about the objects it draws)
+        self.profiler = Profiler() # times the parts of each frame (off by default, see options.profile)
+        self.watch_growth = False # if True, warn when the number of drawn objects or canvas items grows steadily while animating
+        self._growth_samples = collections.deque(maxlen=GROWTH_SAMPLES + 1) # (drawn objects, canvas items) counts
+        self._growth_sample_time = 0
 
-        self._canvas.bind("<Configure>", lambda e: self.draw_grid())
+        self._canvas.bind("<Configure>", lambda e: self._on_view_changed())
         
         self._canvas.bind("<ButtonPress-3>", self.scroll_start)
         self._canvas.bind("<ButtonPress-2>", self.scroll_start)
         self._canvas.bind("<B3-Motion>", self.scroll_move)
         self._canvas.bind("<B2-Motion>", self.scroll_move)
         self._canvas.bind("<MouseWheel>", self._on_mousewheel)
+        self._canvas.bind("<ButtonPress-1>", lambda e: self.pointer_press(self._canvas.canvasx(e.x), self._canvas.canvasy(e.y)))
+        self._canvas.bind("<B1-Motion>", lambda e: self.pointer_move(self._canvas.canvasx(e.x), self._canvas.canvasy(e.y)))
+        self._canvas.bind("<ButtonRelease-1>", lambda e: self.pointer_release(self._canvas.canvasx(e.x), self._canvas.canvasy(e.y)))
         
         self._time_last = time.time()
+        self.elapsed = 0.0 # seconds of animation so far (the sum of the dt's passed to on_update(), used by Polyline's max_age)
         self._canvas.after(int(1000/self._fps),self._on_update)
 
     @property
@@ -57,6 +95,25 @@ class CommandInterpretter:
         else:
             self.clear_grid()
 
+    @property
+    def immediate_redraw(self):
+        return self._immediate_redraw
+
+    @immediate_redraw.setter
+    def immediate_redraw(self, value):
+        self._immediate_redraw = value
+        if value:
+            self.flush()
+
+    @property
+    def lod_tolerance(self):
+        return self._lod_tolerance
+
+    @lod_tolerance.setter
+    def lod_tolerance(self, value):
+        self._lod_tolerance = value
+        self.redraw()
+
     @property
     def grid_size(self):
         return self._grid_size
@@ -64,12 +121,46 @@ class CommandInterpretter:
     @grid_size.setter
     def grid_size(self, value):
         self._grid_size = value
-        self._grid_offset = self._grid_size * 10
+        self._update_transform()
+        self.redraw()
+
+    def _update_transform(self):
+        """Rebuilds the grid space -> canvas space transform from the origin and grid size."""
+        self._view_rect = None
+        self.drag_handles.invalidate() # (the handles' canvas positions moved)
         self._initial_transform = (
             AffineT.identity()
-            @ AffineT.translation(self._grid_offset, self._grid_offset)
+            @ AffineT.translation(self._origin[0], self._origin[1])
             @ AffineT.scaling(self._grid_size, self._grid_size)
         )
+
+    @Profiler.timed("zoom")
+    def zoom(self, factor, anchor_x, anchor_y):
+        """Zooms the view by 'factor', keeping the canvas point (anchor_x, anchor_y) fixed.
+
+        Existing canvas items are scaled in place (cheap), and objects are only properly redrawn once no zoom has
+        happened for ZOOM_SETTLE_DELAY milliseconds.
+        """
+        grid_size = min(max(self._grid_size * factor, MIN_GRID_SIZE), MAX_GRID_SIZE)
+        factor = grid_size / self._grid_size
+        if factor == 1:
+            return
+
+        self._grid_size = grid_size
+        self._origin = (
+            anchor_x + (self._origin[0] - anchor_x) * factor,
+            anchor_y + (self._origin[1] - anchor_y) * factor,
+        )
+        self._update_transform()
+        self._canvas.scale("!grid", anchor_x, anchor_y, factor, factor)
+        self.draw_grid()
+
+        if self._zoom_settle_job is not None:
+            self._canvas.after_cancel(self._zoom_settle_job)
+        self._zoom_settle_job = self._canvas.after(ZOOM_SETTLE_DELAY, self._on_zoom_settled)
+
+    def _on_zoom_settled(self):
+        self._zoom_settle_job = None
         self.redraw()
 
     @property
@@ -78,21 +169,124 @@ class CommandInterpretter:
         return self._initial_transform
     
     def _on_mousewheel(self, event):
-        factor = 1.5
-        self.grid_size += factor * (event.delta / 120)
+        # zoom around the mouse cursor
+        factor = ZOOM_STEP ** (event.delta / 120)
+        self.zoom(factor, self._canvas.canvasx(event.x), self._canvas.canvasy(event.y))
 
     def _on_update(self):
         """Executed roughly every 1/fps seconds."""
         time_now = time.time()
         
+        try:
+            with self.profiler.span("frame"):
+                self._apply_drag()
+                self.step(time_now - self._time_last)
+                if self.profiler.enabled:
+                    with self.profiler.span("tk"):
+                        self._canvas.update_idletasks() # (Tk would render the changes once idle anyway, this times it)
+            self.profiler.frame_done(self._canvas)
+            if self.watch_growth and "on_update" in self._globals:
+                self._check_growth()
+        finally:
+            self._time_last = time_now
+            self._canvas.after(int(1000/self._fps),self._on_update)
+
+    def pointer_press(self, x, y):
+        """Called when the left mouse button is pressed at the canvas point (x, y): starts dragging the handle there (if any)."""
+        self.drag_handles.press(x, y)
+
+    def pointer_move(self, x, y):
+        """Called when the mouse moves to (x, y) with the left button down. The drag is applied at the next frame (so
+        however many motion events come in, objects are moved and redrawn once per frame).
+        """
+        self.drag_handles.move(x, y)
+
+    def pointer_release(self, x, y):
+        """Called when the left mouse button is released at (x, y): moves the dragged handle there and stops dragging."""
+        if self.drag_handles.dragging is None:
+            return
+        self.drag_handles.move(x, y)
+        self._apply_drag()
+        self.drag_handles.release()
+        self.flush()
+
+    def _apply_drag(self):
+        """Moves the dragged handle to where the mouse is, then calls the script's on_drag(obj) if it has one (so it
+        can update the objects that depend on the dragged one).
+        """
+        obj = self.drag_handles.apply()
+        if obj is None or "on_drag" not in self._globals:
+            return
+        try:
+            with self.profiler.span("on_drag"):
+                self._globals["on_drag"](obj)
+        except Exception as e:
+            print("Error in on_drag():",e)
+
+    def step(self, dt):
+        """Advances the script's animation by 'dt' seconds (calls its on_update(dt), then redraws the objects that changed)."""
+        self.elapsed += dt
         try:
             if "on_update" in self._globals:
-                self._globals["on_update"](time_now - self._time_last)
+                with self.profiler.span("on_update"):
+                    self._globals["on_update"](dt)
         except Exception as e:
             print("Error in on_update():",e)
         finally:
-            self._time_last = time_now
-            self._canvas.after(int(1000/self._fps),self._on_update)
+            self.flush()
+
+    def _check_growth(self):
+        """Samples the number of drawn objects and canvas items (every GROWTH_SAMPLE_INTERVAL seconds), and warns if one
+        of them grew in each of the last GROWTH_SAMPLES samples (e.g. on_update() draws new objects without clearing
+        the old ones).
+        """
+        now = time.time()
+        if now - self._growth_sample_time < GROWTH_SAMPLE_INTERVAL:
+            return
+        self._growth_sample_time = now
+        self._growth_samples.append((len(self.math_objects), len(self._canvas.find_all())))
+        if len(self._growth_samples) <= GROWTH_SAMPLES:
+            return
+
+        for i, what in enumerate(("drawn objects", "canvas items")):
+            counts = [sample[i] for sample in self._growth_samples]
+            if all(a < b for a, b in zip(counts, counts[1:])):
+                print(
+                    f"Warning: the number of {what} has been growing for {GROWTH_SAMPLES * GROWTH_SAMPLE_INTERVAL} seconds "
+                    f"({counts[0]} -> {counts[-1]}). Does on_update() draw new objects without clearing old ones? (see stats())"
+                )
+                self._growth_samples.clear() # (warn again only if it keeps growing)
+                break
+
+    def stats(self):
+        """Returns a dict that describes the scene (see utilities.stats())."""
+        objects = collections.Counter()
+        items = collections.Counter()
+        geometry = collections.Counter()
+        owned = set()
+        in_view = 0
+        for obj in list(self.math_objects.values()):
+            name = type(obj).__name__
+            obj_items = obj._owned_items()
+            objects[name] += 1
+            items[name] += len(obj_items)
+            geometry[name] += obj._geometry_bytes()
+            owned.update(obj_items)
+            in_view += obj._materialized
+        alive = collections.Counter(type(obj).__name__ for obj in gc.get_objects() if isinstance(obj, MathObject))
+
+        canvas_items = set(self._canvas.find_all())
+        own_items = set(self._canvas.find_withtag("grid")) | set(self._canvas.find_withtag("profiler"))
+        return {
+            "drawn objects": dict(objects.most_common()),
+            "existing objects": dict(alive.most_common()),
+            "canvas items": dict(items.most_common()),
+            "grid items": len(own_items),
+            "orphaned items": len(canvas_items - owned - own_items),
+            "missing items": len(owned - canvas_items),
+            "objects in view": in_view,
+            "geometry bytes": dict(geometry.most_common()),
+        }
 
     @property
     def initial_transform(self):
@@ -103,64 +297,252 @@ class CommandInterpretter:
 
     def scroll_move(self, event):
         self._canvas.scan_dragto(event.x, event.y, gain=1)
+        self._on_view_changed()
+
+    def _on_view_changed(self):
+        """Called when the camera moves (pan) or the canvas is resized."""
+        self._view_rect = None
         self.draw_grid()
+        self.update_visibility()
 
     def clear_grid(self):
         self._canvas.delete("grid")
+        self._grid_lines = ([], [])
+        self._grid_axes = None
+
+    def add_math_object(self, obj):
+        """Adds 'obj' to the scene (the collection of objects that get redrawn when the view changes), and creates its canvas items if it is in view. Called by MathObject.draw()."""
+        if id(obj) not in self.math_objects and self._running_cell is not None:
+            self._running_cell.objects.append(obj)
+        self.math_objects[id(obj)] = obj
+        self.update_bounds(obj)
+
+    def remove_math_object(self, obj):
+        """Removes 'obj' from the scene. Called by MathObject.clear()."""
+        key = id(obj)
+        self.math_objects.pop(key, None)
+        self._index.remove(key)
+        self._shown.discard(key)
+
+    def update_bounds(self, obj):
+        """Updates the spatial index entry of the drawn object 'obj' (call after its bounds changed), and creates or deletes its canvas items if it moved into or out of view."""
+        key = id(obj)
+        bounds = obj.bounds()
+        if bounds is None:
+            # objects that don't cover anything (e.g. empty polylines) are always "in view"
+            self._index.remove(key)
+            self._shown.discard(key)
+            if not obj._materialized:
+                obj._materialize()
+            return
+
+        self._index.insert(key, bounds)
+        view = self.view_rect()
+        if bounds[0] <= view[2] and bounds[2] >= view[0] and bounds[1] <= view[3] and bounds[3] >= view[1]:
+            self._shown.add(key)
+            if not obj._materialized:
+                obj._materialize()
+        else:
+            self._shown.discard(key)
+            if obj._materialized:
+                obj._release()
+
+    @Profiler.timed("update_visibility")
+    def update_visibility(self):
+        """Creates canvas items for the drawn objects that came into view, and deletes the canvas items of the ones that went out of view."""
+        visible = self._index.query(self.view_rect())
+
+        for key in self._shown - visible:
+            obj = self.math_objects.get(key)
+            if obj is not None and obj._materialized:
+                obj._release()
+
+        for key in visible - self._shown:
+            obj = self.math_objects.get(key)
+            if obj is not None and not obj._materialized:
+                obj._materialize()
+
+        self._shown = visible
+
+    def view_rect(self):
+        """Returns the (xmin, ymin, xmax, ymax) rectangle, in grid space, that the camera is viewing (plus a VIEW_MARGIN pixel margin)."""
+        if self._view_rect is None:
+            (left, top), _, (right, bottom), _ = self.camera_rect()
+            ox, oy = self._origin
+            s = self._grid_size
+            self._view_rect = (
+                (left - VIEW_MARGIN - ox) / s,
+                (top - VIEW_MARGIN - oy) / s,
+                (right + VIEW_MARGIN - ox) / s,
+                (bottom + VIEW_MARGIN - oy) / s,
+            )
+        return self._view_rect
+
+    def mark_dirty(self, obj):
+        """Schedules 'obj' to be redrawn by the next flush(). Called by MathObject when one of its properties changes."""
+        if self._immediate_redraw:
+            obj.redraw()
+        else:
+            self._dirty[id(obj)] = obj
+
+    @Profiler.timed("flush")
+    def flush(self):
+        """Redraws every object that changed since the last flush (each object is redrawn once, no matter how many times it changed)."""
+        while self._dirty:
+            dirty = self._dirty
+            self._dirty = {}
+            for obj in dirty.values():
+                obj.redraw()
 
+    @Profiler.timed("redraw")
     def redraw(self):
+        self._dirty.clear() # everything is about to be redrawn anyway
+
+        # remove all object items
+        self._canvas.delete("!grid")
+        self._index.clear()
+        self._shown.clear()
+
         # redraw grid
         self.draw_grid()
 
         # redraw mathobjects
-        for obj in self.math_objects:
+        for obj in list(self.math_objects.values()):
             obj.redraw()
 
+        if self.profiler.enabled:
+            self.profiler.draw_overlay(self._canvas)
+
+    @Profiler.timed("draw_grid")
     def draw_grid(self):
+        """Draws the grid over the area the camera is viewing.
+
+        Grid line items are kept between calls and just moved (via coords()), so panning doesn't create or delete items
+        unless the number of visible lines changes.
+        """
         if not self._show_grid:
             return
-        
-        self.clear_grid()
 
         # get area that camera is viewing (only draw grid in this area)
-        tl, tr, br, bl = self.camera_rect()
+        (left, top), _, (right, bottom), _ = self.camera_rect()
 
-        # round to nearest grid_size
-        tl = (round(tl[0] / self._grid_size) * self._grid_size, round(tl[1] / self._grid_size) * self._grid_size)
-        tr = (round(tr[0] / self._grid_size) * self._grid_size, round(tr[1] / self._grid_size) * self._grid_size)
-        br = (round(br[0] / self._grid_size) * self._grid_size, round(br[1] / self._grid_size) * self._grid_size)
-        bl = (round(bl[0] / self._grid_size) * self._grid_size, round(bl[1] / self._grid_size) * self._grid_size)
+        # when zoomed far out, only draw every 2nd, 5th, 10th, 20th, ... line so lines are at least MIN_GRID_SPACING apart
+        spacing = self._grid_size
+        multipliers = (2, 2.5, 2)
+        i = 0
+        while spacing < MIN_GRID_SPACING:
+            spacing *= multipliers[i % 3]
+            i += 1
 
-        # draw grid
-        for i in np.arange(tl[0], tr[0], self._grid_size):
-            self._canvas.create_line(i, tl[1], i, bl[1], fill="#ddd", tags="grid")
-        for i in np.arange(tl[1], bl[1], self._grid_size):
-            self._canvas.create_line(tl[0], i, tr[0], i, fill="#ddd", tags="grid")
+        # lines are at origin + k * spacing (rounded outwards to the nearest line)
+        origin_x, origin_y = self._initial_transform.c, self._initial_transform.f
+        xs = origin_x + spacing * np.arange(math.floor((left - origin_x) / spacing), math.ceil((right - origin_x) / spacing) + 1)
+        ys = origin_y + spacing * np.arange(math.floor((top - origin_y) / spacing), math.ceil((bottom - origin_y) / spacing) + 1)
+
+        vertical, horizontal = self._grid_lines
+        self._resize_grid_pool(vertical, len(xs))
+        self._resize_grid_pool(horizontal, len(ys))
+        for item, x in zip(vertical, xs.tolist()):
+            self._canvas.coords(item, x, top, x, bottom)
+        for item, y in zip(horizontal, ys.tolist()):
+            self._canvas.coords(item, left, y, right, y)
 
         # draw origin
-        self._canvas.create_line(self._grid_offset, tl[1], self._grid_offset, bl[1], fill="#666", tags="grid")
-        self._canvas.create_line(tl[0], self._grid_offset, tr[0], self._grid_offset, fill="#666", tags="grid")
+        if self._grid_axes is None:
+            self._grid_axes = (
+                self._canvas.create_line(0, 0, 0, 0, fill="#666", tags="grid"),
+                self._canvas.create_line(0, 0, 0, 0, fill="#666", tags="grid"),
+            )
+            self._canvas.tag_lower("grid")
+        self._canvas.coords(self._grid_axes[0], origin_x, top, origin_x, bottom)
+        self._canvas.coords(self._grid_axes[1], left, origin_y, right, origin_y)
+
+    def _resize_grid_pool(self, pool, size):
+        """Creates or deletes grid line items so that 'pool' has exactly 'size' items."""
+        while len(pool) > size:
+            self._canvas.delete(pool.pop())
+        while len(pool) < size:
+            item = self._canvas.create_line(0, 0, 0, 0, fill="#ddd", tags="grid")
+            self._canvas.tag_lower(item) # below everything else (including the axes)
+            pool.append(item)
 
-        self._canvas.tag_lower("grid")
+    @Profiler.timed("execute_script")
+    def execute_script(self, text, restart=False):
+        """Runs the given text as Python code.
 
-    def execute_script(self, text):
-        """Runs the given text as Python code. Clears the variables first."""
+        The script is split into cells (see Cell). Only the cells that changed since the last run (and the cells they
+        affect) run again; the variables and drawn objects of the other cells are kept. If 'restart' is True (or
+        this is the first run, or nothing changed in a script that animates with on_update()), the variables are
+        cleared first and every cell runs.
+        """
         config.command_interpretter = self
 
         import utilities
         utilities.options._command_interpretter = self
 
-        self.math_objects.clear()
-        self._globals.clear()
-        self._canvas.delete(tk.ALL)
-        self.draw_grid()
+        cells = Cell.split(text)
+        if restart or "__builtins__" not in self._globals:
+            self.math_objects.clear()
+            self._index.clear()
+            self._shown.clear()
+            self._dirty.clear()
+            self.drag_handles.clear()
+            self._globals.clear()
+            self._canvas.delete("!grid")
+            self.draw_grid()
+            self._cells = []
+        self._import_namespace()
 
-        self.execute_commands_immediate(text)
+        old_cells = self._cells # (keeps the objects of the old cells alive until they are erased)
+        run, stale = Cell.plan(old_cells, cells)
+        self._cells = cells
+        if not any(run) and len(cells) == len(old_cells):
+            # nothing changed. Running an animation again restarts it (its state may be in any cell), anything else
+            # would come out the same
+            if "on_update" in self._globals:
+                self.execute_script(text, restart=True)
+            return
+
+        # erase everything that wasn't drawn by a cell that is kept (including objects drawn by on_update(), etc)
+        kept = {id(obj) for cell, r in zip(cells, run) if not r for obj in cell.objects}
+        for key, obj in list(self.math_objects.items()):
+            if key not in kept:
+                obj.clear()
+        del old_cells
+
+        for name in stale - set().union(*(cell.binds for cell in cells)):
+            self._globals.pop(name, None)
+        for cell, r in zip(cells, run):
+            if r:
+                cell.objects, cell.values, cell.done = [], {}, False
+
+        try:
+            for cell, r in zip(cells, run):
+                if not r:
+                    # (the names may have been rebound by a cell that runs again)
+                    self._globals.update((name, value) for name, value in cell.values.items() if name in stale)
+                    continue
+                self._running_cell = cell
+                with self.profiler.span("cell"):
+                    exec(cell.code, self._globals)
+                cell.values = {name: self._globals[name] for name in cell.binds if name in self._globals}
+                cell.done = True
+        finally:
+            self._running_cell = None
+            self.flush()
+
+    def _import_namespace(self):
+        """Makes the names scripts can use (Vector, AffineT, draw(), etc) available to them, if they aren't yet."""
+        if "__builtins__" not in self._globals:
+            exec("from commandinterpretter import *", self._globals)
 
     def execute_commands_immediate(self, text):
         """Runs the given text as Python code. Does not clear the variables first."""
-        exec("from commandinterpretter import *", self._globals)
-        exec(text, self._globals)
+        self._import_namespace()
+        try:
+            exec(text, self._globals)
+        finally:
+            self.flush()
 
     def camera_rect(self):
         """Returns a rectangle representing area of the canvas that the camera (window) is currently viewing.
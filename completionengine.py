@@ -0,0 +1,349 @@
+import ast
+import collections
+import hashlib
+import inspect
+import math
+import os
+import queue
+import tempfile
+import textwrap
+import threading
+import types
+
+STUB_MODULE = "playground_namespace" # name of the generated module that describes the script namespace
+CACHE_SIZE = 100 # number of completion results kept (least recently used ones are dropped)
+
+# special methods that are kept in the stub (so jedi can infer the results of operators, indexing, etc)
+STUB_SPECIAL_METHODS = (
+    "__init__", "__add__", "__radd__", "__sub__", "__neg__", "__mul__", "__rmul__", "__matmul__", "__pow__",
+    "__getitem__", "__len__", "__iter__",
+)
+
+class _Source:
+    """A default value in a stub signature, printed as the given source text."""
+
+    def __init__(self, source):
+        self._source = source
+
+    def __repr__(self):
+        return self._source
+
+class CompletionEngine:
+    """Computes autocompletions for scripts (using jedi) on a background thread.
+
+    Instead of analysing the interpreter's source for every completion, the names a script can use (Vector, AffineT,
+    draw(), ...) are described by a small generated stub module, which scripts are analysed against. jedi caches the
+    parsed stub, so it is only parsed once.
+
+    Use request() to ask for completions (a newer request replaces any request that hasn't started yet, and the results
+    of stale requests are dropped) and poll() to get the results (call it from the GUI thread, e.g. with after()).
+
+    Creating an engine is cheap: importing jedi, building the namespace and writing the stub happen on the worker
+    thread, so they don't delay the window from appearing.
+    """
+
+    def __init__(self, namespace=None):
+        """'namespace' is a dict of the names scripts can use (by default, what CommandInterpretter gives scripts)."""
+        self._namespace = namespace
+        self._jedi = None # the jedi module, once _prepare() imported it
+        self._project = None
+        self._header = f"from {STUB_MODULE} import *\n" # put in front of scripts (so the line numbers are 1 off)
+
+        self._cache = collections.OrderedDict() # key of (text, line, column) -> completion names, least recently used first
+        self._jedi_lock = threading.Lock() # jedi isn't thread safe
+        self._lock = threading.Lock() # protects _cache, _pending and _latest
+        self._wakeup = threading.Condition(self._lock)
+        self._pending = None # (request id, text, line, column) of the request waiting for the worker thread
+        self._latest = 0 # id of the newest request (results of older ones are dropped)
+        self._results = queue.SimpleQueue() # (request id, completion names) of finished requests
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def script_namespace():
+        """The names that scripts can use (what 'from commandinterpretter import *' gives them)."""
+        import commandinterpretter
+
+        return {name: value for name, value in vars(commandinterpretter).items() if not name.startswith("_")}
+
+    # -- completing --
+
+    def request(self, text, line, column):
+        """Asks for the completions at (line, column) of the script 'text' (line is 1 based). Returns the request's id."""
+        with self._lock:
+            self._latest += 1
+            self._pending = (self._latest, text, line, column)
+            self._wakeup.notify()
+            return self._latest
+
+    def cancel(self):
+        """Drops the current request (its results, if it is already running, will be ignored)."""
+        with self._lock:
+            self._latest += 1
+            self._pending = None
+
+    def poll(self):
+        """Returns (request id, completion names) if the latest request has finished, otherwise None."""
+        result = None
+        while True:
+            try:
+                finished = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if finished[0] == self._latest:
+                result = finished
+        return result
+
+    def complete(self, text, line, column):
+        """Returns the names of the completions at (line, column) of the script 'text', right away (i.e. on this thread)."""
+        key = hashlib.blake2b(f"{line}:{column}:{text}".encode(), digest_size=16).digest()
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        with self._jedi_lock:
+            self._prepare()
+            completions = self._script(text).complete(line + 1, column)
+        names = [c.name for c in completions if not c.name.startswith("_")]
+
+        with self._lock:
+            self._cache[key] = names
+            if len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return names
+
+    def script(self, text):
+        """Returns a jedi Script for the script 'text' (its line numbers are 1 more than in 'text')."""
+        with self._jedi_lock:
+            self._prepare()
+        return self._script(text)
+
+    def _script(self, text):
+        return self._jedi.Script(self._header + text, project=self._project)
+
+    def _prepare(self):
+        """Imports jedi and writes the stub, the first time it is called (call it with _jedi_lock held)."""
+        if self._jedi is not None:
+            return
+        import jedi # (slow, so not at the top of the module)
+
+        namespace = self._namespace if self._namespace is not None else CompletionEngine.script_namespace()
+
+        # write the stub (only when it changed, since jedi caches parsed modules by path and modification time)
+        stub_dir = os.path.join(tempfile.gettempdir(), "matrix_playground")
+        os.makedirs(stub_dir, exist_ok=True)
+        stub = CompletionEngine.generate_stub(namespace)
+        stub_path = os.path.join(stub_dir, STUB_MODULE + ".py")
+        existing = None
+        if os.path.exists(stub_path):
+            with open(stub_path, "r") as f:
+                existing = f.read()
+        if existing != stub:
+            with open(stub_path, "w") as f:
+                f.write(stub)
+
+        self._project = jedi.Project(stub_dir, added_sys_path=[stub_dir])
+        self._jedi = jedi
+
+    def _run(self):
+        """The worker thread: completes the latest pending request, forever."""
+        while True:
+            with self._lock:
+                while self._pending is None:
+                    self._wakeup.wait()
+                request_id, text, line, column = self._pending
+                self._pending = None
+
+            try:
+                names = self.complete(text, line, column)
+            except Exception: # jedi can fail on unusual code, there are just no completions then
+                names = []
+
+            with self._lock:
+                if request_id == self._latest:
+                    self._results.put((request_id, names))
+
+    # -- generating the stub --
+
+    @staticmethod
+    def generate_stub(namespace):
+        """Returns the source of a module that declares the names in 'namespace' without their implementation: classes
+        (with their methods, properties and constants), functions, modules and other values.
+
+        Return types are added where the source makes them obvious (e.g. 'return Vector(...)'), so that completions
+        work on the results of calls too.
+        """
+        class_names = {value: name for name, value in namespace.items() if inspect.isclass(value)}
+        lines = [
+            "# generated from the script namespace (see CompletionEngine.generate_stub()), do not edit",
+            "from typing import Union as _Union",
+            "",
+        ]
+        emitted = set()
+
+        def emit_class(cls):
+            if cls in emitted or cls is object or cls.__module__ == "builtins":
+                return
+            emitted.add(cls)
+            class_names.setdefault(cls, cls.__name__)
+            bases = [base for base in cls.__bases__ if base is not object and base.__module__ != "builtins"]
+            for base in bases:
+                emit_class(base)
+            lines.extend(CompletionEngine._class_stub(cls, class_names[cls], [class_names.get(b, b.__name__) for b in bases], class_names))
+            lines.append("")
+
+        for name, value in namespace.items():
+            if isinstance(value, types.ModuleType):
+                lines.append(f"import {value.__name__}" + (f" as {name}" if name != value.__name__ else ""))
+            elif inspect.isclass(value):
+                emit_class(value)
+            elif inspect.isfunction(value):
+                lines.extend(CompletionEngine._function_stub(value, name, class_names))
+                lines.append("")
+            elif CompletionEngine._is_literal(value):
+                lines.append(f"{name} = {value!r}")
+            elif type(value).__module__ != "builtins":
+                emit_class(type(value))
+                lines.append(f"{name} = {class_names[type(value)]}()")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _class_stub(cls, name, bases, class_names):
+        lines = [f"class {name}({', '.join(bases)}):" if bases else f"class {name}:"]
+        doc = CompletionEngine._summary(cls)
+        if doc:
+            lines.append(f"    {doc}")
+
+        for attr, value in cls.__dict__.items():
+            if attr.startswith("_") and attr not in STUB_SPECIAL_METHODS:
+                continue
+            if isinstance(value, property):
+                if value.fget is not None:
+                    lines.append("    @property")
+                    lines.extend(CompletionEngine._function_stub(value.fget, attr, class_names, cls, indent="    "))
+            elif isinstance(value, (staticmethod, classmethod)):
+                lines.append(f"    @{type(value).__name__}")
+                lines.extend(CompletionEngine._function_stub(value.__func__, attr, class_names, cls, indent="    "))
+            elif inspect.isfunction(value):
+                lines.extend(CompletionEngine._function_stub(value, attr, class_names, cls, indent="    "))
+            elif CompletionEngine._is_literal(value):
+                lines.append(f"    {attr} = {value!r}")
+
+        # public attributes that are only set on instances (e.g. 'self.position = ...' in __init__)
+        for attr in CompletionEngine._instance_attributes(cls):
+            if attr not in cls.__dict__:
+                lines.append(f"    {attr} = ...")
+
+        if len(lines) == 1:
+            lines.append("    pass")
+        return lines
+
+    @staticmethod
+    def _function_stub(func, name, class_names, cls=None, indent=""):
+        try:
+            signature = inspect.signature(func)
+            parameters = [
+                p.replace(
+                    annotation=inspect.Parameter.empty,
+                    default=p.default if p.default is inspect.Parameter.empty or CompletionEngine._is_literal(p.default) else _Source("..."),
+                )
+                for p in signature.parameters.values()
+            ]
+            signature = str(signature.replace(parameters=parameters, return_annotation=inspect.Signature.empty))
+        except (TypeError, ValueError):
+            signature = "(*args, **kwargs)"
+
+        returns = CompletionEngine._return_type(func, class_names, cls)
+        lines = [f"{indent}def {name}{signature}{' -> ' + returns if returns else ''}:"]
+        doc = CompletionEngine._summary(func)
+        lines.append(f"{indent}    {doc or '...'}")
+        return lines
+
+    @staticmethod
+    def _return_type(func, class_names, cls, depth=0):
+        """The type 'func' obviously returns (e.g. it has 'return Vector(...)' or 'return Ellipse.circle(...)'), as stub
+        source, or None if it isn't obvious.
+        """
+        if depth > 3:
+            return None
+        try:
+            tree = ast.parse(textwrap.dedent(inspect.getsource(func)))
+        except (OSError, TypeError, SyntaxError): # no source (e.g. in the installed program)
+            return None
+
+        known = {name: c for c, name in class_names.items()}
+        types_returned = []
+        nodes = list(ast.iter_child_nodes(tree.body[0]))
+        while nodes:
+            node = nodes.pop()
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.Lambda, ast.ClassDef)):
+                continue # returns of nested functions aren't ours
+            nodes.extend(ast.iter_child_nodes(node))
+            if not isinstance(node, ast.Return) or node.value is None:
+                continue
+            value = node.value
+            if isinstance(value, ast.Name) and value.id == "NotImplemented":
+                continue
+            if isinstance(value, ast.Call) and isinstance(value.func, ast.Name) and value.func.id in known:
+                types_returned.append(value.func.id)
+            elif isinstance(value, ast.Name) and value.id == "self" and cls is not None:
+                types_returned.append(class_names.get(cls, cls.__name__))
+            elif (
+                isinstance(value, ast.Call)
+                and isinstance(value.func, ast.Attribute)
+                and isinstance(value.func.value, ast.Name)
+                and value.func.value.id in known
+                and inspect.isfunction(getattr(known[value.func.value.id], value.func.attr, None))
+            ):
+                # a call of another class's static method, e.g. 'return Ellipse.circle(...)'
+                called = getattr(known[value.func.value.id], value.func.attr)
+                returned = CompletionEngine._return_type(called, class_names, known[value.func.value.id], depth + 1)
+                if returned is None:
+                    return None
+                types_returned.append(returned)
+            else:
+                return None # something that isn't obvious
+
+        types_returned = sorted(set(types_returned))
+        if not types_returned:
+            return None
+        if len(types_returned) == 1:
+            return types_returned[0]
+        return f"_Union[{', '.join(types_returned)}]"
+
+    @staticmethod
+    def _instance_attributes(cls):
+        """Names of the public attributes that __init__ assigns to 'self'."""
+        init = cls.__dict__.get("__init__")
+        if not inspect.isfunction(init):
+            return []
+        try:
+            tree = ast.parse(textwrap.dedent(inspect.getsource(init)))
+        except (OSError, TypeError, SyntaxError):
+            return []
+        names = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Attribute) and isinstance(node.ctx, ast.Store) and isinstance(node.value, ast.Name):
+                if node.value.id == "self" and not node.attr.startswith("_") and node.attr not in names:
+                    names.append(node.attr)
+        return names
+
+    @staticmethod
+    def _summary(obj):
+        """The first line of the docstring of 'obj', as a docstring literal (or None if it has none)."""
+        doc = obj.__doc__ # (not inspect.getdoc(), which would give inherited docstrings)
+        if not doc or not doc.strip():
+            return None
+        return repr(inspect.cleandoc(doc).splitlines()[0])
+
+    @staticmethod
+    def _is_literal(value):
+        """Whether repr(value) is valid source for the value (numbers, strings, and tuples/lists of them, etc)."""
+        if isinstance(value, float):
+            return math.isfinite(value)
+        if isinstance(value, (bool, int, str, type(None))):
+            return True
+        if isinstance(value, (tuple, list)) and len(value) <= 16:
+            return all(CompletionEngine._is_literal(v) for v in value)
+        return False
@@ -1,14 +1,30 @@
 import tkinter as tk
 import typing
+import bisect
+import difflib
 
 class Completions(tk.Frame):
-    """Auto-completion/call hint widget."""
+    """Auto-completion/call hint widget.
+
+    The filter matches completions that start with it (case sensitive first, then case insensitive), then completions
+    whose words (camelCase or snake_case) start with its pieces (e.g. 'aip' matches 'apply_in_place'), then completions
+    that contain its letters in order. Matches are ranked in that order, ties keep the order of the completions.
+    """
+
+    # match kinds, best first
+    PREFIX = 0
+    PREFIX_IGNORE_CASE = 1
+    WORDS = 2
+    FUZZY = 3
 
     def __init__(self, master=None):
         super().__init__(master)
 
         self._completions = []
         self._filter = ''
+        self._index = [] # (lower case completion, position in self._completions), sorted, for prefix lookups
+        self._ranked = {'': []} # filter -> ranked list of (match kind, position) (cleared when the completions change)
+        self._shown = [] # completions currently in the listbox
         scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL)
         self._listbox = tk.Listbox(self, yscrollcommand=scrollbar.set)
         scrollbar.config(command=self._listbox.yview)
@@ -24,20 +40,103 @@ class Completions(tk.Frame):
 
     def set_completions(self, completions: typing.Collection[str]):
         """Set the completions to display."""
-        self._completions = completions
+        self._completions = list(dict.fromkeys(completions)) # (without duplicates)
+        self._index = sorted((completion.lower(), i) for i, completion in enumerate(self._completions))
+        self._ranked = {'': [(Completions.PREFIX, i) for i in range(len(self._completions))]}
         self._draw()
 
-    def _draw(self):
-        self._listbox.delete(0, tk.END)
-        matching = [completion for completion in self._completions if completion.startswith(self._filter)]
-        for completion in matching:
-            self._listbox.insert(tk.END, completion)
-
     def set_filter(self, filter: str):
         """Set the filter to use when displaying completions."""
         self._filter = filter
         self._draw()
 
+    def matching(self, filter: str=None) -> typing.List[str]:
+        """Returns the completions that match 'filter' (default: the current filter), best matches first."""
+        filter = self._filter if filter is None else filter
+        return [self._completions[i] for _, i in self._match(filter)]
+
+    def _draw(self):
+        # only change the listbox rows that differ from what is shown (from the end, so the indices stay valid)
+        matching = self.matching()
+        opcodes = difflib.SequenceMatcher(None, self._shown, matching, autojunk=False).get_opcodes()
+        for tag, i1, i2, j1, j2 in reversed(opcodes):
+            if tag == 'equal':
+                continue
+            if i2 > i1:
+                self._listbox.delete(i1, i2 - 1)
+            if j2 > j1:
+                self._listbox.insert(i1, *matching[j1:j2])
+        self._shown = matching
+
+    def _match(self, filter):
+        """Returns the ranked (match kind, position) of the completions that match 'filter'."""
+        ranked = self._ranked.get(filter)
+        if ranked is not None:
+            return ranked
+
+        # prefix matches come straight from the sorted index
+        lower = filter.lower()
+        start = bisect.bisect_left(self._index, (lower,))
+        prefixed = set()
+        for key, i in self._index[start:]:
+            if not key.startswith(lower):
+                break
+            prefixed.add(i)
+
+        # every match of 'filter' also matches any prefix of it, so only the matches of the longest filter seen so far
+        # that 'filter' extends need to be checked for word/fuzzy matches (narrowing the filter scans fewer completions)
+        parent = filter[:-1]
+        while parent not in self._ranked:
+            parent = parent[:-1]
+        ranked = [(Completions.PREFIX if self._completions[i].startswith(filter) else Completions.PREFIX_IGNORE_CASE, i) for i in prefixed]
+        for _, i in self._ranked[parent]:
+            if i in prefixed:
+                continue
+            completion = self._completions[i]
+            if Completions._matches_words(lower, Completions._words(completion)):
+                ranked.append((Completions.WORDS, i))
+            elif Completions._matches_fuzzy(lower, completion.lower()):
+                ranked.append((Completions.FUZZY, i))
+        ranked.sort()
+
+        self._ranked[filter] = ranked
+        return ranked
+
+    @staticmethod
+    def _words(completion):
+        """Splits 'completion' into its lower case camelCase/snake_case words ('apply_in_place' -> ['apply', 'in', 'place'])."""
+        words = []
+        word = ''
+        previous = ''
+        for c in completion:
+            if c == '_' or (c.isupper() and previous.islower()):
+                if word:
+                    words.append(word)
+                word = ''
+            if c != '_':
+                word += c.lower()
+            previous = c
+        if word:
+            words.append(word)
+        return words
 
+    @staticmethod
+    def _matches_words(filter, words):
+        """True if 'filter' is a prefix of the first of 'words' followed by prefixes of some of the words after it ('tv' matches ['translation', 'vector'])."""
+        if not filter:
+            return True
+        if not words or filter[0] != words[0][0]:
+            return False
+        # try the longest piece of 'filter' that the first word starts with first
+        for length in range(min(len(filter), len(words[0])), 0, -1):
+            if words[0].startswith(filter[:length]):
+                rest = filter[length:]
+                if any(Completions._matches_words(rest, words[j:]) for j in range(1, len(words) + 1)):
+                    return True
+        return False
 
-    
\ No newline at end of file
+    @staticmethod
+    def _matches_fuzzy(filter, completion):
+        """True if 'completion' contains the letters of 'filter' in order."""
+        letters = iter(completion)
+        return all(c in letters for c in filter)
@@ -3,3 +3,5 @@
 command_interpretter = None # will be set by by CommandInterpretter right before it executes code
 
 LABEL_FONT = ("Arial", "20", "bold")
+
+LOD_TOLERANCE = 1 # pixels, vertices of long polylines/polygons that are closer together than this on screen aren't drawn by default (0 draws every vertex)
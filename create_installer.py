@@ -28,7 +28,6 @@ if __name__ == "__main__":
     )
 
     # copy resources to dist/matrix_playground
-    shutil.copy("commandinterpretter.py", "dist/matrix_playground")
     shutil.copy("icon.ico", "dist/matrix_playground")
     shutil.copy("quickreference.txt", "dist/matrix_playground")
     shutil.copy("examples.txt", "dist/matrix_playground")
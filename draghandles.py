@@ -0,0 +1,125 @@
+import weakref
+from spatialindex import SpatialIndex
+
+HANDLE_RADIUS = 8 # pixels, how close to a handle the mouse has to be pressed to grab it
+HANDLE_CELL_SIZE = 32 # pixels, size of the cells of the hit-test index
+MAX_HANDLES = 256 # objects with more handles than this (e.g. polygons with many vertices) can't be dragged
+MAX_CHANGED = 10000 # the changed objects are re-indexed once there are this many (so animations that never get clicked don't pile them up)
+
+class DragHandles:
+    """The points of the drawn objects that can be dragged with the mouse: Points, the tips of Vectors and the vertices
+    of Polygons (see MathObject._handles()).
+
+    Hit-testing uses a SpatialIndex of the handles' canvas space positions. The index is updated lazily: drawing an
+    object only notes that its handles changed, and they are re-indexed when the mouse is pressed, so animations
+    barely pay for it (objects that were released since are skipped by the hit-test). While a handle is dragged, the
+    mouse position is only recorded; apply() moves the handle to it once per frame, however many motion events came in.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self._index = SpatialIndex(HANDLE_CELL_SIZE) # (object id, handle number) -> canvas space position of the handle (as a rectangle)
+        self._counts = {} # object id -> number of handles of the object in the index
+        self._objects = {} # object id -> weak reference to the object (the object's handles are removed when it is garbage collected)
+        self._changed = {} # object id -> weak reference to the object, of the objects whose handles have to be re-indexed
+        self._drag = None # (object, handle number) of the handle being dragged
+        self._pointer = None # canvas space mouse position that the dragged handle hasn't been moved to yet
+
+    def changed(self, obj):
+        """Called when 'obj' was drawn (so its handles are re-indexed before the next hit-test)."""
+        self._changed[id(obj)] = weakref.ref(obj) # (cheap, references without a callback are shared)
+        if len(self._changed) > MAX_CHANGED:
+            self._update()
+
+    def invalidate(self):
+        """Called when the grid space -> canvas space transform changed (e.g. zooming, which scales the canvas items
+        without redrawing the objects), so every handle is re-indexed before the next hit-test.
+        """
+        self._changed.update(self._objects)
+
+    def hit(self, x, y):
+        """Returns the (object, handle number) of the handle nearest to the canvas point (x, y), if it is within
+        HANDLE_RADIUS pixels of it (otherwise None).
+        """
+        self._update()
+
+        r = HANDLE_RADIUS
+        best = None
+        for key in self._index.query((x - r, y - r, x + r, y + r)):
+            if not self._objects[key[0]]()._materialized: # (released, e.g. out of view or cleared)
+                continue
+            hx, hy, _, _ = self._index.get(key)
+            distance = (hx - x) ** 2 + (hy - y) ** 2
+            if distance <= r * r and (best is None or distance < best[0]):
+                best = (distance, key)
+        if best is None:
+            return None
+        (key, handle) = best[1]
+        return (self._objects[key](), handle)
+
+    def _update(self):
+        """Re-indexes the handles of the objects that changed."""
+        for key, ref in self._changed.items():
+            obj = ref()
+            if obj is not None: # (objects that were garbage collected already removed their handles)
+                self._reindex(key, obj)
+        self._changed.clear()
+
+    def _reindex(self, key, obj):
+        """Replaces the index entries of 'obj' (whose id is 'key') with its current handles."""
+        self._forget(key)
+        if not obj._materialized:
+            return
+        handles = obj._handles()
+        if len(handles) == 0 or len(handles) > MAX_HANDLES:
+            return
+        transform = obj._screen_transform()
+        for i, (x, y) in enumerate(handles):
+            hx, hy = transform._apply_point(float(x), float(y))
+            self._index.insert((key, i), (hx, hy, hx, hy))
+        self._counts[key] = len(handles)
+        self._objects[key] = weakref.ref(obj, lambda ref, key=key: self._forget(key))
+
+    def _forget(self, key):
+        for i in range(self._counts.pop(key, 0)):
+            self._index.remove((key, i))
+        self._objects.pop(key, None)
+
+    def press(self, x, y):
+        """Starts dragging the handle at the canvas point (x, y), if there is one. Returns whether there was."""
+        self._drag = self.hit(x, y) if self.enabled else None
+        self._pointer = None
+        return self._drag is not None
+
+    def move(self, x, y):
+        """Records the mouse position (canvas space) that the dragged handle should be moved to."""
+        if self._drag is not None:
+            self._pointer = (x, y)
+
+    def release(self):
+        """Stops dragging (call apply() first, so the handle ends up where the mouse was released)."""
+        self._drag = None
+        self._pointer = None
+
+    def apply(self):
+        """Moves the dragged handle to the last recorded mouse position. Returns the object if it was moved (else None)."""
+        if self._drag is None or self._pointer is None:
+            return None
+        obj, handle = self._drag
+        x, y = (obj._screen_transform() ** -1)._apply_point(*self._pointer) # (to the object's space)
+        self._pointer = None
+        obj._drag_handle(handle, float(x), float(y))
+        return obj
+
+    def clear(self):
+        """Forgets all handles (and stops dragging)."""
+        self._index.clear()
+        self._counts.clear()
+        self._objects.clear()
+        self._changed.clear()
+        self.release()
+
+    @property
+    def dragging(self):
+        """The object whose handle is being dragged (or None)."""
+        return None if self._drag is None else self._drag[0]
@@ -0,0 +1,178 @@
+from mathobject import MathObject
+from config import LABEL_FONT
+import functools
+import math
+import numpy as np
+import tkinter as tk
+
+class Ellipse(MathObject):
+    """An ellipse (or circle), or an arc of one.
+
+    The ellipse is kept as an exact (analytic) shape: the affine matrix that maps the unit circle onto it. It is only
+    turned into line segments when it is drawn, with as many segments as its size on the screen needs (so small circles
+    are cheap and big, zoomed in ones stay smooth).
+    """
+
+    __slots__ = ("_matrix", "_start", "_extent")
+
+    TOLERANCE = 0.25 # max distance (in pixels) between the drawn segments and the true curve
+    MIN_SEGMENTS = 8 # segments used for a full ellipse, no matter how small
+    MAX_SEGMENTS = 4096
+    DRAGGABLE = True
+
+    @staticmethod
+    def circle(x, y, r):
+        return Ellipse(x, y, r, r)
+
+    @staticmethod
+    def arc(x, y, r, start, extent):
+        """An arc of the circle with center (x,y) and radius r, from angle 'start' to 'start + extent' (in degrees, from the x axis towards the y axis, like rotations)."""
+        return Ellipse(x, y, r, r, start=start, extent=extent)
+
+    def __init__(self, x, y, rx, ry, angle=0, start=0, extent=360, label=None):
+        """An ellipse with center (x,y), radii rx and ry, rotated by 'angle' degrees.
+
+        If 'extent' is less than 360, only the arc from angle 'start' to 'start + extent' (in degrees, measured before
+        the ellipse is rotated) is drawn, as a line.
+        """
+        super().__init__()
+        c, s = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+        self._matrix = np.array([[c * rx, -s * ry, x], [s * rx, c * ry, y], [0, 0, 1]], dtype=np.float64) # unit circle -> ellipse
+        self._start = start
+        self._extent = extent
+        self._label = label
+
+    @staticmethod
+    def _from_matrix(matrix, start=0, extent=360):
+        """Creates the Ellipse that the affine 'matrix' (3x3) maps the unit circle onto."""
+        ellipse = Ellipse(0, 0, 1, 1, start=start, extent=extent)
+        ellipse._matrix = np.array(matrix, dtype=np.float64)
+        return ellipse
+
+    def copy(self):
+        return Ellipse._from_matrix(self._matrix, self._start, self._extent)
+
+    @property
+    def x(self):
+        return self._matrix[0, 2]
+
+    @property
+    def y(self):
+        return self._matrix[1, 2]
+
+    @property
+    def is_arc(self):
+        return abs(self._extent) < 360
+
+    @staticmethod
+    def segment_count(radius, extent=360, tolerance=None):
+        """The number of segments needed to draw an arc of 'extent' degrees of a circle with the given radius (in pixels)
+        such that no segment is more than 'tolerance' pixels away from the circle.
+
+        Counts are rounded up to a multiple of 8, so that similar sizes share the same unit_circle() table.
+        """
+        tolerance = Ellipse.TOLERANCE if tolerance is None else tolerance
+        if radius <= tolerance:
+            segments = 1
+        else:
+            step = 2 * math.acos(1 - tolerance / radius) # max angle a segment can span (its chord's sagitta is then 'tolerance')
+            segments = math.ceil(math.radians(abs(extent)) / step)
+        segments = -(-segments // 8) * 8
+        return min(max(segments, Ellipse.MIN_SEGMENTS), Ellipse.MAX_SEGMENTS)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def unit_circle(segments, extent=360):
+        """Returns the points of an arc of the unit circle from angle 0 to 'extent' (degrees), split into 'segments'
+        segments, as a read-only (N,2) array of (cos, sin) pairs. A full circle doesn't repeat its first point.
+
+        Tables are cached, so drawing many circles of a similar size on screen only computes cos/sin once.
+        """
+        full = abs(extent) >= 360
+        angles = np.linspace(0, math.radians(extent), segments + 1)
+        if full:
+            angles = angles[:-1]
+        table = np.column_stack((np.cos(angles), np.sin(angles)))
+        table.setflags(write=False)
+        return table
+
+    def _arc_matrix(self):
+        """The matrix that maps the unit circle arc from 0 to 'extent' onto this arc (i.e. with the start angle applied)."""
+        if self._start == 0:
+            return self._matrix
+        c, s = math.cos(math.radians(self._start)), math.sin(math.radians(self._start))
+        return self._matrix @ np.array([[c, -s, 0], [s, c, 0], [0, 0, 1]])
+
+    def points(self, segments=None):
+        """Returns the points of the ellipse (in grid space) as an (N,2) array. By default, 'segments' is chosen for
+        the current zoom.
+        """
+        if segments is None:
+            segments = self._screen_segment_count(self._screen_transform()._matrix)
+        m = self._arc_matrix()
+        return Ellipse.unit_circle(segments, self._extent) @ m[:2, :2].T + m[:2, 2]
+
+    def to_polygon(self, segments=64):
+        """Returns a Polygon approximating the ellipse with 'segments' segments."""
+        from polygon import Polygon
+
+        return Polygon(self.points(segments), label=self._label)
+
+    def _screen_segment_count(self, screen_matrix):
+        # the largest radius of the ellipse on screen is the largest singular value of its linear part
+        radius = np.linalg.norm(screen_matrix[:2, :2] @ self._matrix[:2, :2], 2)
+        return Ellipse.segment_count(radius, self._extent)
+
+    def _handles(self):
+        # the center, and the point at angle 0 on the ellipse
+        m = self._matrix
+        return ((m[0, 2], m[1, 2]), (m[0, 0] + m[0, 2], m[1, 0] + m[1, 2]))
+
+    def _drag_handle(self, handle, x, y):
+        m = self._matrix
+        if handle == 0:
+            m[:2, 2] = (x, y)
+        else:
+            # rotate and scale the ellipse around its center so the point follows (a circle stays a circle)
+            old = complex(m[0, 0], m[1, 0])
+            if old == 0:
+                return
+            z = complex(x - m[0, 2], y - m[1, 2]) / old
+            m[:2, :2] = np.array([[z.real, -z.imag], [z.imag, z.real]]) @ m[:2, :2]
+        self._invalidate()
+
+    def _geometry_bytes(self):
+        return self._matrix.nbytes
+
+    def _compute_bounds(self):
+        # x = cx + a cos(t) + b sin(t) reaches cx +- sqrt(a^2 + b^2) (arcs use the bounds of the whole ellipse)
+        m = self._matrix.tolist()
+        half_width = math.hypot(m[0][0], m[0][1])
+        half_height = math.hypot(m[1][0], m[1][1])
+        return (m[0][2] - half_width, m[1][2] - half_height, m[0][2] + half_width, m[1][2] + half_height)
+
+    def _render(self):
+        # tessellate straight into canvas space: the unit circle table goes through (screen transform @ ellipse matrix)
+        screen = self._screen_transform()._matrix
+        m = screen @ self._arc_matrix()
+        table = Ellipse.unit_circle(self._screen_segment_count(screen), self._extent)
+        points_transformed = table @ m[:2, :2].T + m[:2, 2]
+
+        if self.is_arc:
+            p = self._canvas.create_line(
+                points_transformed.ravel().tolist(), fill=self.color, width=self.line_width, capstyle=tk.ROUND
+            )
+        else:
+            p = self._canvas.create_polygon(points_transformed.ravel().tolist(), fill=self.color)
+        self._canvas_items.append(p)
+
+        if self._label is not None:
+            center = screen[:2, :2] @ self._matrix[:2, 2] + screen[:2, 2]
+            t = self._canvas.create_text(
+                center[0],
+                center[1],
+                text=self._label,
+                font=LABEL_FONT,
+                fill=self.color if self.is_arc else "#fff", # label and filled ellipse have to be different colors
+            )
+            self._canvas_items.append(t)
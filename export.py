@@ -0,0 +1,112 @@
+import argparse
+import multiprocessing
+import os
+import time
+
+
+description = """Runs a script's animation (its on_update(dt) function) with a fixed time step, without a window and as fast
+as possible, and saves the frames as an animated GIF or as numbered PNG files. Frames are rasterized and encoded by a
+pool of worker processes while the animation is still being stepped."""
+
+FRAMES_PER_TASK = 16 # number of consecutive frames that a worker process rasterizes and encodes in one go
+
+
+def _encode_gif_frames(display_lists, previous_display_list, width, height, supersampling):
+    """Worker process task: rasterizes frames and encodes each one as a GIF image (relative to the frame before it)."""
+    from headlesscanvas import HeadlessCanvas
+    from gifwriter import GifWriter
+
+    previous = None
+    if previous_display_list is not None:
+        previous = HeadlessCanvas.rasterize_display_list(previous_display_list, width, height, supersampling=supersampling).image()
+
+    encoded = []
+    for display_list in display_lists:
+        image = HeadlessCanvas.rasterize_display_list(display_list, width, height, supersampling=supersampling).image()
+        encoded.append(GifWriter.encode_frame(image, previous))
+        previous = image
+    return encoded
+
+
+def _write_png_frames(display_lists, paths, width, height, supersampling):
+    """Worker process task: rasterizes frames and saves each one as a PNG file. Returns the paths."""
+    from headlesscanvas import HeadlessCanvas
+
+    for display_list, path in zip(display_lists, paths):
+        raster = HeadlessCanvas.rasterize_display_list(display_list, width, height, supersampling=supersampling)
+        with open(path, "wb") as f:
+            f.write(raster.png_bytes())
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("script", help="the script to run (it should define an on_update(dt) function)")
+    parser.add_argument(
+        "-o",
+        "--output",
+        required=True,
+        help="a .gif file, or a folder or %%-pattern (e.g. frames/frame_%%04d.png) for numbered PNG files",
+    )
+    parser.add_argument("--fps", type=float, default=30, help="frames per second (the animation is stepped by 1/fps each frame)")
+    parser.add_argument("--seconds", type=float, default=5, help="length of the animation, in seconds")
+    parser.add_argument("--frames", type=int, help="number of frames (overrides --seconds)")
+    parser.add_argument("--width", type=int, default=800, help="width of the frames, in pixels")
+    parser.add_argument("--height", type=int, default=600, help="height of the frames, in pixels")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--supersampling", type=int, default=2, help="antialiasing quality (1 = none)")
+    args = parser.parse_args()
+
+    from headlesscanvas import HeadlessCanvas
+    from commandinterpretter import CommandInterpretter
+    from gifwriter import GifWriter
+
+    frames = args.frames if args.frames is not None else int(round(args.seconds * args.fps))
+    dt = 1 / args.fps
+    gif = args.output.lower().endswith(".gif")
+    if not gif:
+        pattern = args.output if "%" in args.output else os.path.join(args.output, "frame_%05d.png")
+        os.makedirs(os.path.dirname(pattern) or ".", exist_ok=True)
+
+    start = time.time()
+    canvas = HeadlessCanvas(args.width, args.height)
+    command_interpretter = CommandInterpretter(canvas)
+    with open(args.script, "r") as f:
+        command_interpretter.execute_script(f.read())
+
+    with multiprocessing.Pool(args.workers) as pool:
+        # step the animation, handing every FRAMES_PER_TASK frames to the pool as soon as they are captured
+        tasks = []
+        chunk = []
+        previous = None
+        for frame in range(frames):
+            if frame > 0:
+                command_interpretter.step(dt)
+            chunk.append(canvas.display_list())
+
+            if len(chunk) == FRAMES_PER_TASK or frame == frames - 1:
+                if gif:
+                    task_args = (chunk, previous, args.width, args.height, args.supersampling)
+                    tasks.append(pool.apply_async(_encode_gif_frames, task_args))
+                else:
+                    paths = [pattern % i for i in range(frame - len(chunk) + 1, frame + 1)]
+                    task_args = (chunk, paths, args.width, args.height, args.supersampling)
+                    tasks.append(pool.apply_async(_write_png_frames, task_args))
+                previous = chunk[-1]
+                chunk = []
+
+        # collect the results in order (showing how many frames are done, long animations take a while)
+        done = 0
+        if gif:
+            writer = GifWriter(args.output, args.width, args.height, dt)
+        for task in tasks:
+            results = task.get()
+            if gif:
+                for encoded in results:
+                    writer.write_encoded_frame(encoded)
+            done += len(results)
+            print(f"\r{done}/{frames} frames", end="", flush=True)
+        if gif:
+            writer.close()
+
+    print(f"\rexported {frames} frames to {args.output} in {time.time() - start:.1f} seconds")
@@ -0,0 +1,163 @@
+import struct
+import numpy as np
+
+class GifWriter:
+    """Writes an animated GIF, one frame at a time.
+
+    Encoding a frame (encode_frame()) doesn't need the writer, so frames can be encoded in parallel (e.g. in worker
+    processes) and then written in order with write_encoded_frame().
+    """
+
+    def __init__(self, path, width, height, delay, loop=True):
+        """'delay' is the time between frames, in seconds."""
+        self._file = open(path, "wb")
+        self._delay = max(int(round(delay * 100)), 1) # GIF delays are in hundredths of a second
+        self._file.write(b"GIF89a" + struct.pack("<HHBBB", width, height, 0, 0, 0))
+        if loop:
+            self._file.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00")
+
+    def write_encoded_frame(self, encoded):
+        """Writes a frame returned by encode_frame()."""
+        transparent, data = encoded
+        flags = 0x04 | (1 if transparent is not None else 0) # disposal: leave the frame in place (the next frame is drawn over it)
+        self._file.write(b"\x21\xf9\x04" + struct.pack("<BHBB", flags, self._delay, transparent or 0, 0))
+        self._file.write(data)
+
+    def write_frame(self, image, previous=None):
+        self.write_encoded_frame(GifWriter.encode_frame(image, previous))
+
+    def close(self):
+        self._file.write(b"\x3b")
+        self._file.close()
+
+    @staticmethod
+    def encode_frame(image, previous=None):
+        """Encodes a (height, width, 3) uint8 RGB image as a GIF image block. Returns (transparent index or None, bytes).
+
+        If the 'previous' frame is given, only the rectangle that changed is encoded, and unchanged pixels in it are
+        made transparent (so they compress well).
+        """
+        height, width = image.shape[:2]
+        packed = (image[:, :, 0].astype(np.uint32) << 16) | (image[:, :, 1].astype(np.uint32) << 8) | image[:, :, 2]
+
+        left, top, right, bottom = 0, 0, width, height
+        unchanged = None
+        if previous is not None:
+            previous_packed = (previous[:, :, 0].astype(np.uint32) << 16) | (previous[:, :, 1].astype(np.uint32) << 8) | previous[:, :, 2]
+            changed = packed != previous_packed
+            rows = np.flatnonzero(changed.any(axis=1))
+            if len(rows) == 0:
+                left, top, right, bottom = 0, 0, 1, 1 # nothing changed, encode a single transparent pixel
+            else:
+                columns = np.flatnonzero(changed.any(axis=0))
+                left, top, right, bottom = columns[0], rows[0], columns[-1] + 1, rows[-1] + 1
+            packed = packed[top:bottom, left:right]
+            unchanged = ~changed[top:bottom, left:right]
+
+        # build a palette of at most 255 colors (index 255 is kept for transparency), dropping low bits of the colors if
+        # there are too many
+        colors = packed if unchanged is None else packed[~unchanged]
+        shift = 0
+        palette, indices = np.unique(colors, return_inverse=True)
+        while len(palette) > 255:
+            shift += 1
+            mask = np.uint32((0xFF >> shift << shift) * 0x010101)
+            palette, indices = np.unique(colors & mask, return_inverse=True)
+
+        frame_indices = np.full(packed.shape, 255, dtype=np.uint8)
+        if unchanged is None:
+            frame_indices[:] = indices.reshape(packed.shape)
+        else:
+            frame_indices[~unchanged] = indices
+        transparent = None if unchanged is None or not unchanged.any() else 255
+
+        color_table = np.zeros((256, 3), dtype=np.uint8)
+        color_table[: len(palette), 0] = palette >> 16
+        color_table[: len(palette), 1] = (palette >> 8) & 0xFF
+        color_table[: len(palette), 2] = palette & 0xFF
+
+        descriptor = b"\x2c" + struct.pack("<HHHHB", left, top, right - left, bottom - top, 0x87) # local color table of 256 entries
+        return transparent, descriptor + color_table.tobytes() + b"\x08" + GifWriter._sub_blocks(GifWriter._lzw(frame_indices.tobytes()))
+
+    @staticmethod
+    def _lzw(data):
+        """LZW-compresses a string of 8-bit palette indices (GIF flavor: variable code width, LSB first).
+
+        Rendered frames are mostly runs of one index (the background, unchanged pixels), so the data is walked run by
+        run (found with numpy) rather than pixel by pixel. Codes whose strings end in the same index form chains
+        (each one is the previous one plus that index), so matching a run against the table is a jump along a chain
+        instead of one table lookup per pixel. The output is the same as that of plain LZW.
+        """
+        clear, end = 256, 257
+        array = np.frombuffer(data, dtype=np.uint8)
+        starts = np.flatnonzero(np.concatenate(([True], array[1:] != array[:-1])))
+        lengths = np.diff(np.append(starts, len(array)))
+
+        codes = [clear]
+        widths = [9]
+        table = {} # (prefix code << 8) | index -> code of the prefix's string followed by the index
+        last = list(range(256)) + [0] * (4096 - 256) # code -> last index of its string
+        chains = {} # code -> (chain, position of the code in it); chain[k + 1] is chain[k]'s string plus its last index
+        next_code = 258
+        width = 9
+        prefix = None # code of the string matched so far
+        for c, r in zip(array[starts].tolist(), lengths.tolist()):
+            if prefix is None:
+                prefix = c
+                r -= 1
+            while r:
+                # extend the match by the run of c's, as far as the table goes
+                if last[prefix] == c:
+                    chain, k = chains.get(prefix) or chains.setdefault(prefix, ([prefix], 0))
+                    steps = min(r, len(chain) - 1 - k)
+                    if steps:
+                        prefix = chain[k + steps]
+                        r -= steps
+                        continue
+                else:
+                    longer = table.get((prefix << 8) | c)
+                    if longer is not None:
+                        prefix = longer
+                        r -= 1
+                        continue
+
+                # the match can't be extended: emit it, and add it followed by c to the table
+                codes.append(prefix)
+                widths.append(width)
+                if next_code < 4096:
+                    table[(prefix << 8) | c] = next_code
+                    last[next_code] = c
+                    if last[prefix] == c:
+                        chain, k = chains[prefix]
+                        chain.append(next_code)
+                        chains[next_code] = (chain, k + 1)
+                    if next_code == 1 << width and width < 12:
+                        width += 1
+                    next_code += 1
+                else:
+                    codes.append(clear)
+                    widths.append(width)
+                    table = {}
+                    chains = {}
+                    next_code = 258
+                    width = 9
+                prefix = c
+                r -= 1
+        codes += [prefix, end]
+        widths += [width, width]
+
+        # pack the variable width codes into bytes
+        codes = np.array(codes, dtype=np.int64)
+        widths = np.array(widths, dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(widths)[:-1]])
+        bits = np.zeros(int(offsets[-1] + widths[-1] + 7) // 8 * 8, dtype=np.uint8)
+        for b in range(12):
+            has_bit = widths > b
+            bits[offsets[has_bit] + b] = (codes[has_bit] >> b) & 1
+        return np.packbits(bits, bitorder="little").tobytes()
+
+    @staticmethod
+    def _sub_blocks(data):
+        """Splits 'data' into length-prefixed blocks of up to 255 bytes, followed by the terminating empty block."""
+        blocks = [bytes([len(data[i : i + 255])]) + data[i : i + 255] for i in range(0, len(data), 255)]
+        return b"".join(blocks) + b"\x00"
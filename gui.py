@@ -1,16 +1,21 @@
 import tkinter as tk
 from codeeditor import CodeEditor
-from commandinterpretter import CommandInterpretter
-from quickreference import QuickReference
 from help import Help
 
 class GUI(tk.Frame):
-    """Represents the GUI of the application as a whole."""
+    """Represents the GUI of the application as a whole.
 
-    def __init__(self, master=None):
+    The widgets are created right away, the command interpretter (which imports numpy and everything scripts can use)
+    only when start() is called, so that the window can be shown before that.
+    """
+
+    def __init__(self, master=None, separate_process=False):
+        """If 'separate_process' is True, scripts run in a separate process (see RemoteInterpretter)."""
         super().__init__(master)
         
         self._shift_button_pressed = False
+        self._separate_process = separate_process
+        self.command_interpretter = None
 
         self.create_widgets()
 
@@ -19,22 +24,33 @@ class GUI(tk.Frame):
         self.pane = tk.PanedWindow(self, orient=tk.HORIZONTAL, sashrelief=tk.RAISED,sashwidth=10,sashpad=1)
         self.pane.pack(fill=tk.BOTH, expand=True)
 
-        code_editor = CodeEditor(self.pane)
-
-        canvas = tk.Canvas(self.pane)
-        command_interpretter = CommandInterpretter(canvas)
-
-        code_editor.on_execute_script = lambda text: command_interpretter.execute_script(text)
-        code_editor.on_run_immediate = lambda text: command_interpretter.execute_commands_immediate(text)
-
+        self.code_editor = CodeEditor(self.pane)
+        self.canvas = tk.Canvas(self.pane)
         self.help = Help(self.pane)
 
-        self.pane.add(code_editor, width=500)
-        self.pane.add(canvas)
+        self.pane.add(self.code_editor, width=500)
+        self.pane.add(self.canvas)
         self.pane.add(self.help)
 
         # f1 should toggle visibility of quick reference
-        canvas.bind_all("<F1>", self.on_f1_pressed)
+        self.canvas.bind_all("<F1>", self.on_f1_pressed)
+
+    def start(self):
+        """Creates the command interpretter (scripts can be run from then on)."""
+        if self._separate_process:
+            from remoteinterpretter import RemoteInterpretter
+
+            command_interpretter = RemoteInterpretter(self.canvas)
+            self.canvas.bind_all("<Shift-Escape>", lambda e: command_interpretter.stop()) # shift + escape kills the running script
+        else:
+            from commandinterpretter import CommandInterpretter
+
+            command_interpretter = CommandInterpretter(self.canvas)
+
+        self.code_editor.on_execute_script = lambda text, restart: command_interpretter.execute_script(text, restart)
+        self.code_editor.on_run_immediate = lambda text: command_interpretter.execute_commands_immediate(text)
+        self.command_interpretter = command_interpretter
+        self.code_editor.warm_up()
 
     def on_f1_pressed(self, event):
         """Toggles the visibility of the help pane."""
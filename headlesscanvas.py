@@ -0,0 +1,304 @@
+import itertools
+import time
+from xml.sax.saxutils import escape
+from rasterizer import Rasterizer
+
+class HeadlessCanvas:
+    """Stand-in for a tk.Canvas that just remembers its items, so scenes can be rendered without a display.
+
+    Implements the part of the tk.Canvas interface that MathObjects and the CommandInterpretter use (creating, moving,
+    configuring and deleting items, scrolling, after() callbacks, etc). The scene can then be saved as PNG (via
+    Rasterizer) or SVG.
+    """
+
+    def __init__(self, width=800, height=600, background="#ffffff"):
+        self._width = width
+        self._height = height
+        self._background = background
+        self._items = {} # id -> [type, coords, options, tags], in stacking order (bottom to top)
+        self._ids = itertools.count(1)
+        self._scroll = (0, 0) # canvas coordinates of the top left of the window
+        self._scan_mark = None
+        self._after_ids = itertools.count(1)
+        self._pending = {} # after() id -> (due time, callback, args)
+
+    # -- creating items --
+
+    def _create(self, kind, args, options):
+        coords = []
+        for arg in args:
+            if isinstance(arg, (list, tuple)):
+                coords.extend(float(c) for c in arg)
+            else:
+                coords.append(float(arg))
+        tags = options.pop("tags", ())
+        if isinstance(tags, str):
+            tags = (tags,)
+        item = next(self._ids)
+        self._items[item] = [kind, coords, options, tuple(tags)]
+        return item
+
+    def create_line(self, *args, **options):
+        return self._create("line", args, options)
+
+    def create_polygon(self, *args, **options):
+        return self._create("polygon", args, options)
+
+    def create_oval(self, *args, **options):
+        return self._create("oval", args, options)
+
+    def create_text(self, *args, **options):
+        return self._create("text", args, options)
+
+    # -- finding and changing items --
+
+    def _find(self, tag):
+        """Returns the ids of the items matching 'tag' (an id, a tag, 'all' or '!tag'), bottom to top."""
+        if isinstance(tag, int) or (isinstance(tag, str) and tag.isdigit()):
+            return [int(tag)] if int(tag) in self._items else []
+        if tag == "all":
+            return list(self._items)
+        if tag.startswith("!"):
+            return [i for i, item in self._items.items() if tag[1:] not in item[3]]
+        return [i for i, item in self._items.items() if tag in item[3]]
+
+    def find_all(self):
+        return tuple(self._items)
+
+    def find_withtag(self, tag):
+        return tuple(self._find(tag))
+
+    def type(self, item):
+        found = self._find(item)
+        return self._items[found[0]][0] if found else None
+
+    def gettags(self, item):
+        found = self._find(item)
+        return self._items[found[0]][3] if found else ()
+
+    def coords(self, item, *args):
+        found = self._find(item)
+        if not found:
+            return []
+        if args:
+            coords = []
+            for arg in args:
+                if isinstance(arg, (list, tuple)):
+                    coords.extend(float(c) for c in arg)
+                else:
+                    coords.append(float(arg))
+            self._items[found[0]][1] = coords
+        return list(self._items[found[0]][1])
+
+    def itemconfig(self, tag, **options):
+        for item in self._find(tag):
+            self._items[item][2].update(options)
+
+    itemconfigure = itemconfig
+
+    def itemcget(self, item, option):
+        found = self._find(item)
+        return self._items[found[0]][2].get(option, "") if found else ""
+
+    def delete(self, *tags):
+        for tag in tags:
+            for item in self._find(tag):
+                del self._items[item]
+
+    def scale(self, tag, x_origin, y_origin, x_scale, y_scale):
+        for item in self._find(tag):
+            coords = self._items[item][1]
+            for i in range(0, len(coords) - 1, 2):
+                coords[i] = x_origin + (coords[i] - x_origin) * x_scale
+                coords[i + 1] = y_origin + (coords[i + 1] - y_origin) * y_scale
+
+    def move(self, tag, dx, dy):
+        for item in self._find(tag):
+            coords = self._items[item][1]
+            for i in range(0, len(coords) - 1, 2):
+                coords[i] += dx
+                coords[i + 1] += dy
+
+    def tag_lower(self, tag, below=None):
+        """Moves the items matching 'tag' to the bottom (or to just below the lowest item matching 'below')."""
+        self._restack(tag, below, lower=True)
+
+    def tag_raise(self, tag, above=None):
+        """Moves the items matching 'tag' to the top (or to just above the highest item matching 'above')."""
+        self._restack(tag, above, lower=False)
+
+    lower = tag_lower
+    lift = tag_raise
+
+    def _restack(self, tag, reference, lower):
+        moving = self._find(tag)
+        if not moving:
+            return
+        moving_set = set(moving)
+        rest = [i for i in self._items if i not in moving_set]
+        if reference is None:
+            order = moving + rest if lower else rest + moving
+        else:
+            anchors = [i for i in self._find(reference) if i not in moving_set]
+            if not anchors:
+                return
+            position = rest.index(anchors[0]) if lower else rest.index(anchors[-1]) + 1
+            order = rest[:position] + moving + rest[position:]
+        self._items = {i: self._items[i] for i in order}
+
+    # -- view --
+
+    def winfo_width(self):
+        return self._width
+
+    def winfo_height(self):
+        return self._height
+
+    def canvasx(self, x):
+        return self._scroll[0] + x
+
+    def canvasy(self, y):
+        return self._scroll[1] + y
+
+    def scan_mark(self, x, y):
+        self._scan_mark = (x, y, self._scroll)
+
+    def scan_dragto(self, x, y, gain=10):
+        mark_x, mark_y, (scroll_x, scroll_y) = self._scan_mark
+        self._scroll = (scroll_x - (x - mark_x) * gain, scroll_y - (y - mark_y) * gain)
+
+    # -- events --
+
+    def bind(self, sequence=None, func=None, add=None):
+        pass # there are no input events without a display
+
+    def bind_all(self, sequence=None, func=None, add=None):
+        pass
+
+    def after(self, ms, func=None, *args):
+        after_id = f"after#{next(self._after_ids)}"
+        self._pending[after_id] = (time.monotonic() + ms / 1000, func, args)
+        return after_id
+
+    def after_idle(self, func, *args):
+        return self.after(0, func, *args)
+
+    def after_cancel(self, after_id):
+        self._pending.pop(after_id, None)
+
+    def run_pending(self, wait=False):
+        """Runs the after() callbacks that are due (or, if 'wait', all pending ones regardless of when they are due)."""
+        now = time.monotonic()
+        due = sorted((when, after_id) for after_id, (when, _, _) in self._pending.items() if wait or when <= now)
+        for _, after_id in due:
+            entry = self._pending.pop(after_id, None)
+            if entry is not None:
+                entry[1](*entry[2])
+
+    def update_idletasks(self):
+        pass
+
+    # -- output --
+
+    def display_list(self):
+        """Returns the visible items as (type, window coords, options) tuples, bottom to top.
+
+        Window coords are canvas coords relative to the top left of the (scrolled) window.
+        """
+        sx, sy = self._scroll
+        result = []
+        for kind, coords, options, _ in self._items.values():
+            if options.get("state") == "hidden":
+                continue
+            window_coords = [c - (sx if i % 2 == 0 else sy) for i, c in enumerate(coords)]
+            result.append((kind, window_coords, dict(options)))
+        return result
+
+    def rasterize(self, supersampling=3):
+        """Draws the scene into a Rasterizer and returns it."""
+        return HeadlessCanvas.rasterize_display_list(self.display_list(), self._width, self._height, self._background, supersampling)
+
+    @staticmethod
+    def rasterize_display_list(display_list, width, height, background="#ffffff", supersampling=3):
+        """Draws the items of a display_list() into a new Rasterizer and returns it."""
+        raster = Rasterizer(width, height, background, supersampling)
+        for kind, coords, options in display_list:
+            if kind == "line":
+                raster.line(coords, options.get("fill", "black"), options.get("width", 1), options.get("arrow"))
+            elif kind == "polygon":
+                raster.polygon(coords, options.get("fill", "black"))
+                outline = options.get("outline", "")
+                if outline:
+                    raster.line(coords + coords[:2], outline, options.get("width", 1))
+            elif kind == "oval":
+                raster.oval(*coords[:4], options.get("fill", "") or options.get("outline", "black"))
+        return raster
+
+    def save_png(self, path, supersampling=3):
+        with open(path, "wb") as f:
+            f.write(self.rasterize(supersampling).png_bytes())
+
+    def svg(self):
+        """Returns the scene as an SVG document."""
+        return HeadlessCanvas.display_list_to_svg(self.display_list(), self._width, self._height, self._background)
+
+    @staticmethod
+    def display_list_to_svg(display_list, width, height, background="#ffffff"):
+        def color(c):
+            rgb = Rasterizer.parse_color(c)
+            return "none" if rgb is None else "#%02x%02x%02x" % rgb
+
+        def points(coords):
+            return " ".join(f"{coords[i]:.2f},{coords[i + 1]:.2f}" for i in range(0, len(coords) - 1, 2))
+
+        lines = [
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">',
+            '<defs><marker id="arrow" viewBox="0 0 10 8" refX="10" refY="4" markerUnits="userSpaceOnUse" markerWidth="10" markerHeight="8" orient="auto">'
+            '<path d="M0,0 L10,4 L0,8 L2,4 z" fill="context-stroke"/></marker></defs>',
+            f'<rect width="100%" height="100%" fill="{color(background)}"/>',
+        ]
+        for kind, coords, options in display_list:
+            if kind == "line":
+                arrow = options.get("arrow")
+                markers = ""
+                if arrow in ("last", "both"):
+                    markers += ' marker-end="url(#arrow)"'
+                if arrow in ("first", "both"):
+                    markers += ' marker-start="url(#arrow)"'
+                lines.append(
+                    f'<polyline points="{points(coords)}" fill="none" stroke="{color(options.get("fill", "black"))}" '
+                    f'stroke-width="{options.get("width", 1)}" stroke-linecap="{"round" if options.get("capstyle") == "round" else "butt"}" '
+                    f'stroke-linejoin="round"{markers}/>'
+                )
+            elif kind == "polygon":
+                outline = options.get("outline", "")
+                stroke = f' stroke="{color(outline)}" stroke-width="{options.get("width", 1)}"' if outline else ""
+                lines.append(f'<polygon points="{points(coords)}" fill="{color(options.get("fill", "black"))}" fill-rule="evenodd"{stroke}/>')
+            elif kind == "oval":
+                x0, y0, x1, y1 = coords[:4]
+                fill = color(options.get("fill", ""))
+                lines.append(
+                    f'<ellipse cx="{(x0 + x1) / 2:.2f}" cy="{(y0 + y1) / 2:.2f}" rx="{abs(x1 - x0) / 2:.2f}" ry="{abs(y1 - y0) / 2:.2f}" '
+                    f'fill="{fill}" stroke="{color(options.get("outline", "black"))}"/>'
+                )
+            elif kind == "text":
+                font = options.get("font", ("Arial", "12"))
+                family, size = font[0], font[1] if len(font) > 1 else 12
+                weight = ' font-weight="bold"' if "bold" in font[2:] else ""
+                lines.append(
+                    f'<text x="{coords[0]:.2f}" y="{coords[1]:.2f}" font-family="{escape(str(family))}" font-size="{size}pt"{weight} '
+                    f'fill="{color(options.get("fill", "black"))}" text-anchor="middle" dominant-baseline="central">{escape(str(options.get("text", "")))}</text>'
+                )
+        lines.append("</svg>")
+        return "\n".join(lines)
+
+    def save_svg(self, path):
+        with open(path, "w") as f:
+            f.write(self.svg())
+
+    def save(self, path):
+        """Saves the scene as a PNG or SVG file (depending on the extension of 'path')."""
+        if path.lower().endswith(".svg"):
+            self.save_svg(path)
+        else:
+            self.save_png(path)
@@ -18,8 +18,16 @@ class Help(ttk.Frame):
         self._notebook = ttk.Notebook(self)
         self._notebook.pack(fill=tk.BOTH, expand=True)
 
-        self._quick_reference = QuickReference(self._notebook)
-        self._examples = Examples(self._notebook)
-        
-        self._notebook.add(self._quick_reference, text="Quick Reference")
-        self._notebook.add(self._examples, text="Examples")
\ No newline at end of file
+        # the tabs start out empty, each one's pane is created when the tab is first shown (loading their text slows down startup)
+        self._panes = {} # tab -> the class of the pane to create in it (removed once created)
+        self._notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+        for pane, text in ((QuickReference, "Quick Reference"), (Examples, "Examples")):
+            tab = ttk.Frame(self._notebook)
+            self._panes[str(tab)] = pane
+            self._notebook.add(tab, text=text)
+
+    def _on_tab_changed(self, event):
+        tab = self._notebook.select()
+        pane = self._panes.pop(tab, None)
+        if pane is not None:
+            pane(self._notebook.nametowidget(tab)).pack(fill=tk.BOTH, expand=True)
@@ -1,5 +1,4 @@
 from mathobject import MathObject
-import config
 from config import LABEL_FONT
 import numpy as np
 from vector import Vector
@@ -7,8 +6,14 @@ from point import Point
 import tkinter as tk
 from polyline import Polyline
 from polygon import Polygon
+from pointbuffer import PointBuffer
+from ellipse import Ellipse
+from vectorarray import VectorArray
+from pointcloud import PointCloud
 
 class LinearT(MathObject):
+    __slots__ = ("_matrix", "_ihat", "_jhat")
+
     @staticmethod
     def identity():
         return LinearT([[1, 0], [0, 1]])
@@ -27,12 +32,8 @@ class LinearT(MathObject):
         super().__init__()
         self._matrix = np.array(matrix)
         self._label = label
-        self._ihat = Vector(self.a, self.c, label="i")
-        self._jhat = Vector(self.b, self.d, label="j")
-        self._ihat.draw_label_at_end = True
-        self._jhat.draw_label_at_end = True
-        # self._jhat.label_size = 6
-        # self._ihat.label_size = 6
+        self._ihat = None # created the first time they are asked for
+        self._jhat = None
 
     def copy(self):
         return LinearT(self._matrix)
@@ -55,37 +56,76 @@ class LinearT(MathObject):
 
     @property
     def ihat(self):
+        if self._ihat is None:
+            self._ihat = Vector(self.a, self.c, label="i")
+            self._ihat.draw_label_at_end = True
         return self._ihat
 
     @property
     def jhat(self):
+        if self._jhat is None:
+            self._jhat = Vector(self.b, self.d, label="j")
+            self._jhat.draw_label_at_end = True
         return self._jhat
 
-    def draw(self):
-        super().draw()
-        
+    def _apply_array(self, points):
+        """Transforms an (N,2) array of points with a single matrix multiply. Returns a new (N,2) array."""
+        return points @ self._matrix.T
+
+    def apply(self, points):
+        """Transforms many points at once (with a single matrix multiply) and returns them as a new (N,2) numpy array.
+
+        'points' can be an (N,2) array, a sequence of (x,y) pairs, a Polygon, a Polyline or a PointCloud. An Ellipse
+        (e.g. Polygon.circle()) is returned as a new Ellipse instead, as it stays exact.
+        """
+        if isinstance(points, Ellipse):
+            return self * points
+        if isinstance(points, (Polygon, Polyline, PointCloud)):
+            points = points._points.array
+        return self._apply_array(PointBuffer.as_array(points))
+
+    def apply_in_place(self, shape):
+        """Transforms a Polygon, Polyline, PointCloud, Ellipse or (N,2) float array in place (no new shape is created). Returns 'shape'."""
+        if isinstance(shape, (Polygon, Polyline, PointCloud)):
+            points = shape._points.array
+            points[:] = points @ self._matrix.T
+            shape._invalidate()
+        elif isinstance(shape, Ellipse):
+            shape._matrix[:2] = self._matrix @ shape._matrix[:2]
+            shape._invalidate()
+        else:
+            shape[:] = shape @ self._matrix.T
+        return shape
+
+    def _compute_bounds(self):
+        xs = (0, self.a, self.b)
+        ys = (0, self.c, self.d)
+        return (min(xs), min(ys), max(xs), max(ys))
+
+    def _render(self):
         # visualize the coordinate axes of the linear transformation
 
-        start = config.command_interpretter.initial_transform * Vector(0, 0)
+        transform = self._screen_transform()
+        start = transform._apply_point(0, 0)
         ix = self.a
         iy = self.c
-        itransformed = config.command_interpretter.initial_transform * Vector(ix, iy)
+        itransformed = transform._apply_point(ix, iy)
         jx = self.b
         jy = self.d
-        jtransformed = config.command_interpretter.initial_transform * Vector(jx, jy)
+        jtransformed = transform._apply_point(jx, jy)
 
         l1 = self._canvas.create_line(
-            start[0], start[1], itransformed[0], itransformed[1], fill=self._color, arrow=tk.LAST,width=self.line_width
+            start[0], start[1], itransformed[0], itransformed[1], fill=self.color, arrow=tk.LAST,width=self.line_width
         )
         l2 = self._canvas.create_line(
-            start[0], start[1], jtransformed[0], jtransformed[1], fill=self._color, arrow=tk.LAST,width=self.line_width
+            start[0], start[1], jtransformed[0], jtransformed[1], fill=self.color, arrow=tk.LAST,width=self.line_width
         )
         self._canvas_items.append(l1)
         self._canvas_items.append(l2)
 
         if self._label is not None:
             t = self._canvas.create_text(
-                start[0], start[1], text=self._label, font=LABEL_FONT, fill=self._color
+                start[0], start[1], text=self._label, font=LABEL_FONT, fill=self.color
             )
             self._canvas_items.append(t)
 
@@ -114,11 +154,25 @@ class LinearT(MathObject):
 
         # matrix polygon multiplication (transform polygon)
         if isinstance(other, Polygon):
-            return Polygon([self * p for p in other.points])
+            return Polygon(self.apply(other))
 
         # matrix polyline multiplication (transform polyline)
         if isinstance(other, Polyline):
-            return Polyline([self * p for p in other.points])
+            return Polyline(self.apply(other))
+
+        # matrix ellipse multiplication (transform ellipse, the result is still an exact ellipse)
+        if isinstance(other, Ellipse):
+            matrix = other._matrix.copy()
+            matrix[:2] = self._matrix @ matrix[:2]
+            return Ellipse._from_matrix(matrix, other._start, other._extent)
+
+        # matrix point cloud multiplication (transform every point)
+        if isinstance(other, PointCloud):
+            return other._with(self.apply(other))
+
+        # matrix vector array multiplication (transform the components and the tails)
+        if isinstance(other, VectorArray):
+            return other._with(self._apply_array(other._components), self._apply_array(other._positions))
 
         return NotImplemented
 
@@ -1,13 +1,41 @@
 import tkinter as tk
-from gui import GUI
+import argparse
+import multiprocessing
+from startupprofiler import StartupProfiler
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    root.geometry("1380x720")
-    root.title("Matrix Playground")
-    root.iconbitmap("icon.ico")
+    multiprocessing.freeze_support() # (for the script process, in the installed build)
 
-    gui = GUI(root)
-    gui.pack(fill=tk.BOTH, expand=True)
+    parser = argparse.ArgumentParser(description="Matrix Playground")
+    parser.add_argument("--separate-process", action="store_true", help="run scripts in a separate process (the window stays responsive, shift + escape stops a script)")
+    parser.add_argument("--profile-startup", action="store_true", help="print how long each step of startup and each module import took")
+    args = parser.parse_args()
+
+    profiler = StartupProfiler()
+    if args.profile_startup:
+        profiler.install()
+
+    with profiler.phase("import gui"):
+        from gui import GUI
+
+    with profiler.phase("create window"):
+        root = tk.Tk()
+        root.geometry("1380x720")
+        root.title("Matrix Playground")
+        root.iconbitmap("icon.ico")
+
+    with profiler.phase("create widgets"):
+        gui = GUI(root, separate_process=args.separate_process)
+        gui.pack(fill=tk.BOTH, expand=True)
+
+    with profiler.phase("show window"):
+        root.update() # (so the window appears before the slow parts of startup)
+
+    with profiler.phase("create command interpretter"):
+        gui.start()
+
+    if args.profile_startup:
+        profiler.uninstall()
+        profiler.report()
 
     root.mainloop()
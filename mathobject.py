@@ -1,44 +1,184 @@
 import config
 import tkinter as tk
 import random
+import numpy as np
 from utilities import random_color
 
+LOD_MIN_POINTS = 64 # objects with fewer points than this are always drawn with all of them (see _decimated())
+
 class MathObject:
-    """A mathematical object that can be visualized."""
+    """A mathematical object that can be visualized.
+
+    Constructing a MathObject is cheap: it is not added to the scene (and isn't given a color) until it is drawn. This
+    means the intermediate results of arithmetic (e.g. 'T * v') are plain values that never touch the canvas.
+
+    A drawn object only has canvas items while it is in view (see CommandInterpretter.update_visibility()).
+    Subclasses create their canvas items in _render() (transforming their coordinates with _screen_transform()) and
+    report their extent in _compute_bounds().
+
+    An object can be the child of a Node, in which case its coordinates are relative to the node, and it is drawn and
+    redrawn as part of the node (rather than being in the scene by itself).
+
+    The canvas is either a tk.Canvas or a HeadlessCanvas (which has the same interface, but renders to PNG/SVG instead of
+    the screen), so subclasses must only use the canvas methods that HeadlessCanvas implements.
+    """
+
+    __slots__ = ("_label", "_canvas_items", "_color", "_drawn", "_materialized", "_bounds", "_line_width", "_parent", "_lod", "__weakref__", "__dict__") # (__dict__ so scripts can still set their own attributes, e.g. v.name = "velocity")
+
+    DRAGGABLE = False # whether the object has handles that can be dragged with the mouse (see _handles())
 
     def __init__(self):
         self._label = None  # label of the object (e.g. "A") on the canvas
-        self._canvas: tk.Canvas = (
-            config.command_interpretter._canvas  # the canvas the object will be drawn on
-        )
         self._canvas_items = (
             []
-        )  # the items that are drawn on the canvas to represent this render object (e.g. lines, text, etc.), IMPORTANT: all MathObjects must put all their canvas items in this list
-        self._color = random_color()  # color of the object
+        )  # the items that are drawn on the canvas to represent this render object (e.g. lines, text, etc.), IMPORTANT: all MathObjects must put all their canvas items in this list, or override _release() and _owned_items() (like PointCloud and VectorArray, which tag their many items instead)
+        self._color = None  # color of the object (a random one is picked the first time it is needed)
         self._drawn = False # whether a draw() call has been made for this object
+        self._materialized = False # whether the object currently has canvas items (drawn objects that are out of view don't)
+        self._bounds = None # cached result of bounds()
         self._line_width = 2 # width of lines drawn for this object
-        config.command_interpretter.math_objects.append(self)
+        self._parent = None # the Node this object is a child of (if any)
+        self._lod = None # cached (key, indices) of the points _decimated() keeps
 
-    def clear(self):
-        """Clear (erase) the object from the canvas."""
-        # Remove the object's canvas items
+    @property
+    def _canvas(self) -> tk.Canvas:
+        """The canvas the object is drawn on."""
+        return config.command_interpretter._canvas
+
+    def _release(self):
+        """Deletes the object's canvas items (but leaves it in the scene)."""
         for item in self._canvas_items:
             self._canvas.delete(item)
         self._canvas_items = []
+        self._materialized = False
+
+    def _materialize(self):
+        """Creates the object's canvas items."""
+        self._materialized = True
+        self._render()
+        if self.DRAGGABLE:
+            config.command_interpretter.drag_handles.changed(self)
+
+    def _render(self):
+        """Creates the canvas items that represent the object. Implemented by subclasses."""
+        pass
+
+    @staticmethod
+    def _color_array(colors, count):
+        """Converts per-element colors (a sequence of color strings, or an (N,3) array of 0-255 RGB values) to an (N,) array of color strings."""
+        array = np.asarray(colors)
+        if array.ndim == 2:
+            rgb = np.clip(np.rint(array), 0, 255).astype(np.int64)
+            array = np.array(["#%02x%02x%02x" % (r, g, b) for r, g, b in rgb.tolist()])
+        if array.shape != (count,):
+            raise ValueError(f"expected {count} colors, got {len(array)}")
+        return array.astype(str)
+
+    def _screen_transform(self):
+        """The AffineT that transforms the object's coordinates to canvas space."""
+        if self._parent is not None:
+            return self._parent._child_screen_transform()
+        return config.command_interpretter.initial_transform
+
+    def _decimated(self, points, transform):
+        """Returns the points of the (N,2) array 'points' that are worth drawing with 'transform' (the screen transform):
+        of consecutive points that fall in the same lod_tolerance sized pixel cell, only the first one is kept (as is
+        the last point), so zoomed out dense curves cost about as much to draw as sparse ones.
+
+        The cells are aligned to the object's coordinates rather than the screen, so which points are kept only depends
+        on the zoom (not panning). They are cached until the zoom changes or the object changes (_invalidate()).
+        """
+        tolerance = config.command_interpretter.lod_tolerance
+        if not tolerance or len(points) < LOD_MIN_POINTS:
+            return points
+        linear = transform._matrix[:2, :2]
+        key = (linear.tobytes(), tolerance, len(points))
+        if self._lod is None or self._lod[0] != key:
+            cells = np.floor(points @ (linear.T / tolerance))
+            keep = np.empty(len(points), dtype=bool)
+            np.any(cells[1:] != cells[:-1], axis=1, out=keep[1:])
+            keep[0] = keep[-1] = True
+            self._lod = (key, None if keep.all() else np.flatnonzero(keep))
+        indices = self._lod[1]
+        return points if indices is None else points[indices]
+
+    def bounds(self):
+        """Returns the (xmin, ymin, xmax, ymax) rectangle that the object covers, or None if it doesn't cover anything.
+
+        The rectangle is in grid space, or in the space of the object's parent Node if it has one.
+        """
+        if self._bounds is None:
+            self._bounds = self._compute_bounds()
+        return self._bounds
+
+    def _compute_bounds(self):
+        """Computes the value returned by bounds(). Implemented by subclasses."""
+        return None
+
+    def _handles(self):
+        """The (x, y) points (in the object's space) that can be dragged with the mouse. Implemented by DRAGGABLE subclasses."""
+        return ()
+
+    def _drag_handle(self, handle, x, y):
+        """Moves the point _handles()[handle] to (x, y) (in the object's space). Implemented by DRAGGABLE subclasses."""
+        pass
+
+    def _owned_items(self):
+        """The canvas items the object currently has (used by CommandInterpretter.stats())."""
+        return list(self._canvas_items)
+
+    def _geometry_bytes(self):
+        """Approximate memory used by the object's geometry (its points, etc), in bytes. Implemented by subclasses that store arrays."""
+        return 0
+
+    def clear(self):
+        """Clear (erase) the object from the canvas. If the object is the child of a Node, it is removed from the node."""
+        if self._parent is not None:
+            self._parent.remove(self)
+            return
+
+        # Remove the object's canvas items
+        self._release()
         self._drawn = False
+        config.command_interpretter.remove_math_object(self)
 
     def draw(self):
-        """Draws the object on the canvas. 
-        
-        Must be implemented by subclasses, and subclasses must call super().draw() at the start of their implementation."""
+        """Draws the object on the canvas (if it is out of view, it will be drawn once it comes into view).
+
+        Drawing the child of a Node draws the whole tree the node is in.
+        """
+        if self._parent is not None:
+            self._parent.draw()
+            return
+
         self._drawn = True
+        config.command_interpretter.add_math_object(self)
 
     def redraw(self):
         """Clears then re-draws the object."""
         if self._drawn:
-            self.clear()
+            self._release()
             self.draw()
 
+    def _invalidate(self):
+        """Marks the object as changed. If it is drawn, it will be redrawn (once) at the end of the current frame."""
+        self._bounds = None
+        self._lod = None
+        if self._drawn:
+            config.command_interpretter.mark_dirty(self)
+        elif self._parent is not None:
+            self._parent._invalidate() # the node (tree) is redrawn
+
+    def _bounds_changed(self):
+        """Tells the scene that bounds() changed, for changes that don't need the object to be redrawn (e.g. the object
+        updated its own canvas items).
+        """
+        if self._drawn:
+            config.command_interpretter.update_bounds(self)
+        elif self._parent is not None:
+            self._parent._bounds = None
+            self._parent._bounds_changed()
+
     @property
     def label(self):
         return self._label
@@ -46,22 +186,24 @@ class MathObject:
     @label.setter
     def label(self, value):
         self._label = value
-        self.redraw()
+        self._invalidate()
 
     @property
     def color(self):
+        if self._color is None:
+            self._color = random_color()
         return self._color
 
     @color.setter
     def color(self, value):
         self._color = value
-        self.redraw()
+        self._invalidate()
 
     @property
     def line_width(self):
         return self._line_width
-    
+
     @line_width.setter
     def line_width(self, value):
         self._line_width = value
-        self.redraw()
+        self._invalidate()
@@ -0,0 +1,140 @@
+from mathobject import MathObject
+import config
+from config import LABEL_FONT
+from affinet import AffineT
+import numpy as np
+
+class Node(MathObject):
+    """A group of MathObjects (its children) that share a coordinate system.
+
+    The node has a local transform (an AffineT) that maps its children's coordinates to its parent's coordinates (or to
+    grid space, if it has no parent). Children can be any MathObject, including other Nodes, so nodes form a tree.
+    Changing a node's transform moves, rotates, scales, etc everything below it without touching their points.
+
+    World transforms (child coordinates -> grid space) are cached, and changing a node's transform only invalidates the
+    cached transforms below that node.
+    """
+
+    __slots__ = ("_transform", "_children", "_world", "_screen")
+
+    def __init__(self, transform=None, children=(), label=None):
+        super().__init__()
+        self._transform = AffineT.identity() if transform is None else transform
+        self._children = []
+        self._world = None # cached world_transform
+        self._screen = None # cached (initial transform, child screen transform) pair
+        self._label = label
+        self.add(*children)
+
+    def copy(self):
+        """Returns a copy of the node, with copies of its children."""
+        return Node(self._transform, [child.copy() for child in self._children], self._label)
+
+    @property
+    def transform(self):
+        """The local transform: maps the children's coordinates to the parent's coordinates."""
+        return self._transform
+
+    @transform.setter
+    def transform(self, value):
+        self._transform = value
+        self._invalidate_world()
+        self._invalidate()
+
+    @property
+    def world_transform(self):
+        """Maps the children's coordinates to grid space (i.e. the transforms of this node and all its ancestors, combined)."""
+        if self._world is None:
+            if self._parent is None:
+                self._world = self._transform
+            else:
+                self._world = self._parent.world_transform @ self._transform
+        return self._world
+
+    @property
+    def children(self):
+        return tuple(self._children)
+
+    @property
+    def parent(self):
+        return self._parent
+
+    def add(self, *children):
+        """Adds MathObjects as children of the node. A child that is drawn by itself (or is in another node) is moved here."""
+        for child in children:
+            ancestor = self
+            while ancestor is not None:
+                if ancestor is child:
+                    raise ValueError("can't add a node to itself or to one of its descendants")
+                ancestor = ancestor._parent
+
+            if child._parent is not None:
+                child._parent.remove(child)
+            elif child._drawn:
+                child.clear()
+            child._parent = self
+            if isinstance(child, Node):
+                child._invalidate_world()
+            self._children.append(child)
+        self._invalidate()
+
+    def remove(self, *children):
+        """Removes children from the node (they are erased)."""
+        for child in children:
+            if child._parent is not self:
+                continue
+            child._release()
+            child._parent = None
+            if isinstance(child, Node):
+                child._invalidate_world()
+            self._children.remove(child)
+        self._invalidate()
+
+    def _invalidate_world(self):
+        """Forgets the cached world transforms of this node and the nodes below it."""
+        self._world = None
+        self._screen = None
+        for child in self._children:
+            if isinstance(child, Node):
+                child._invalidate_world()
+
+    def _child_screen_transform(self):
+        """The AffineT that transforms the children's coordinates to canvas space."""
+        initial = config.command_interpretter.initial_transform
+        if self._screen is None or self._screen[0] is not initial: # the view changes (zoom, etc) replace the initial transform
+            self._screen = (initial, initial @ self.world_transform)
+        return self._screen[1]
+
+    def _release(self):
+        for child in self._children:
+            child._release()
+        super()._release()
+
+    def _render(self):
+        for child in self._children:
+            child._materialize()
+
+        if self._label is not None:
+            origin = self._child_screen_transform()._apply_point(0, 0)
+            t = self._canvas.create_text(origin[0], origin[1], text=self._label, font=LABEL_FONT, fill=self.color)
+            self._canvas_items.append(t)
+
+    def _owned_items(self):
+        return super()._owned_items() + [item for child in self._children for item in child._owned_items()]
+
+    def _geometry_bytes(self):
+        return sum(child._geometry_bytes() for child in self._children)
+
+    def _compute_bounds(self):
+        # the corners of the children's bounds, transformed to the parent's coordinates
+        corners = []
+        for child in self._children:
+            b = child.bounds()
+            if b is not None:
+                corners += [(b[0], b[1]), (b[2], b[1]), (b[2], b[3]), (b[0], b[3])]
+        if self._label is not None:
+            corners.append((0, 0))
+        if not corners:
+            return None
+        corners = self._transform._apply_array(np.array(corners, dtype=np.float64))
+        return tuple(corners.min(axis=0).tolist() + corners.max(axis=0).tolist())
@@ -1,10 +1,14 @@
 from mathobject import MathObject
-import config
 from config import LABEL_FONT
 from vector import Vector
 
 class Point(MathObject):
     """A 2d point."""
+
+    __slots__ = ("_point",)
+
+    DRAGGABLE = True
+
     def __init__(self, x, y, label=None):
         super().__init__()
         self._point = (x, y)
@@ -13,17 +17,15 @@ class Point(MathObject):
     def copy(self):
         return Point(self._point[0], self._point[1])
 
-    def draw(self):
-        super().draw()
-        
-        transformed = config.command_interpretter.initial_transform * Vector(self._point[0], self._point[1])
+    def _render(self):
+        transformed = self._screen_transform()._apply_point(self._point[0], self._point[1])
         o = self._canvas.create_oval(
             transformed[0] - 3,
             transformed[1] - 3,
             transformed[0] + 3,
             transformed[1] + 3,
-            fill=self._color,
-            outline=self._color,
+            fill=self.color,
+            outline=self.color,
         )
         self._canvas_items.append(o)
 
@@ -33,10 +35,20 @@ class Point(MathObject):
                 transformed[1] + 10,
                 text=self._label,
                 font=LABEL_FONT,
-                fill=self._color
+                fill=self.color
             )
             self._canvas_items.append(t)
 
+    def _handles(self):
+        return (self._point,)
+
+    def _drag_handle(self, handle, x, y):
+        self._point = (x, y)
+        self._invalidate()
+
+    def _compute_bounds(self):
+        return (self._point[0], self._point[1], self._point[0], self._point[1])
+
     def __add__(self, other):
         if isinstance(other, Vector):
             return Point(
@@ -0,0 +1,93 @@
+import numpy as np
+
+class PointBuffer:
+    """A growable list of 2d points, stored contiguously as an (N,2) float64 numpy array.
+
+    Appending is amortized O(1) (the underlying array doubles in capacity when it runs out of room). Points can also be
+    dropped from the front (e.g. for a trail that only keeps its last N points): the buffer then works like a ring
+    buffer whose points stay contiguous, since they are only moved back to the start of the array when the end is
+    reached, and the array only grows if it is more than half full then.
+    """
+
+    def __init__(self, points=None, capacity=16):
+        """'points' can be an (N,2) array or any sequence of (x,y) pairs (tuples, lists, Points, Vectors, etc)."""
+        array = PointBuffer.as_array(points)
+        self._size = len(array)
+        self._start = 0 # index in _data of the first point (dropping points from the front just moves it)
+        self._data = np.empty((max(capacity, self._size), 2))
+        self._data[: self._size] = array
+
+    @staticmethod
+    def as_array(points):
+        """Converts 'points' (an (N,2) array or a sequence of (x,y) pairs) to an (N,2) float64 array."""
+        if points is None:
+            return np.empty((0, 2))
+        if isinstance(points, PointBuffer):
+            return points.array
+        if isinstance(points, np.ndarray):
+            return points.astype(np.float64, copy=False).reshape(-1, 2)
+        return np.array([(p[0], p[1]) for p in points], dtype=np.float64).reshape(-1, 2)
+
+    @property
+    def array(self):
+        """The points as an (N,2) array. This is a view into the buffer (i.e. not a copy)."""
+        return self._data[self._start : self._start + self._size]
+
+    def append(self, point):
+        """Appends a single (x,y) point."""
+        end = self._start + self._size
+        if end == len(self._data):
+            self._make_room(self._size + 1)
+            end = self._size
+        self._data[end, 0] = point[0]
+        self._data[end, 1] = point[1]
+        self._size += 1
+
+    def extend(self, points):
+        """Appends multiple points."""
+        array = PointBuffer.as_array(points)
+        needed = self._size + len(array)
+        if self._start + needed > len(self._data):
+            self._make_room(needed)
+        self._data[self._start + self._size : self._start + needed] = array
+        self._size = needed
+
+    def drop_front(self, count):
+        """Removes the first 'count' points (O(1), the points aren't moved)."""
+        count = min(count, self._size)
+        self._start += count
+        self._size -= count
+        if self._size == 0:
+            self._start = 0
+
+    def copy(self):
+        return PointBuffer(self.array)
+
+    def _make_room(self, needed):
+        """Moves the points to the start of the underlying array, growing it first if that wouldn't leave room for
+        'needed' points or would leave it more than half full (so that moving the points stays amortized O(1)).
+        """
+        if needed <= len(self._data) // 2:
+            self._data[: self._size] = self.array # (numpy copies overlapping ranges correctly)
+        else:
+            data = np.empty((max(needed, 2 * len(self._data)), 2))
+            data[: self._size] = self.array
+            self._data = data
+        self._start = 0
+
+    @property
+    def nbytes(self):
+        """The memory used by the points, in bytes (including the capacity that isn't used yet)."""
+        return self._data.nbytes
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [tuple(p) for p in self.array[key].tolist()]
+        x, y = self.array[key]
+        return (float(x), float(y))
+
+    def __iter__(self):
+        return (tuple(p) for p in self.array.tolist())
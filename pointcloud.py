@@ -0,0 +1,183 @@
+from mathobject import MathObject
+from config import LABEL_FONT
+from point import Point
+from vector import Vector
+from vectorarray import VectorArray
+from pointbuffer import PointBuffer
+import numpy as np
+
+class PointCloud(MathObject):
+    """Many 2d points, stored as a numpy array (with optional per-point colors).
+
+    Behaves like one object: it has one entry in the scene and supports vectorized arithmetic (so particle systems with
+    tens of thousands of points stay fast). Use it instead of many Points. Drawing transforms all points at once, but
+    still creates one canvas item per point (Tk has no item that draws many separate shapes), so it mostly saves the
+    overhead of separate objects; points that would land on the same pixel are skipped.
+    """
+
+    __slots__ = ("_points", "_colors", "_size")
+
+    __array_ufunc__ = None # so that e.g. 'array + points' uses PointCloud.__radd__ instead of numpy broadcasting
+
+    def __init__(self, points=None, colors=None, size=6, label=None):
+        """'points' is an (N,2) array or a sequence of (x,y) pairs. 'colors' is an optional color per point (color
+        strings, or an (N,3) array of 0-255 RGB values); by default all points have the object's color. 'size' is the
+        diameter of the points, in pixels.
+        """
+        super().__init__()
+        self._points = PointBuffer(points) # (N,2) array of the points, in grid space
+        self._colors = None if colors is None else MathObject._color_array(colors, len(self._points))
+        self._size = size
+        self._label = label
+
+    def _with(self, points):
+        """Returns a new PointCloud at 'points' with the same colors and size."""
+        result = PointCloud(points, size=self._size)
+        result._colors = self._colors
+        return result
+
+    def copy(self):
+        return self._with(self._points.copy())
+
+    @property
+    def points(self):
+        """The points, as an (N,2) array (a view: change it in place and call changed(), or assign a new array)."""
+        return self._points.array
+
+    @points.setter
+    def points(self, value):
+        count = len(self._points)
+        self._points = PointBuffer(value)
+        if len(self._points) != count:
+            self._colors = None
+        self._invalidate()
+
+    def changed(self):
+        """Call after changing the 'points' array in place, so the points are redrawn."""
+        self._invalidate()
+
+    def add(self, point, color=None):
+        """Adds a point (with its own color, if the points have per-point colors). 'color' is a color string or an
+        (r,g,b) of 0-255 values, like the per-point colors.
+        """
+        if self._colors is not None:
+            color = MathObject._color_array([self.color if color is None else color], 1)
+        self._points.append(point)
+        if self._colors is not None:
+            self._colors = np.concatenate((self._colors, color))
+        self._invalidate()
+
+    @property
+    def colors(self):
+        return self._colors
+
+    @colors.setter
+    def colors(self, value):
+        self._colors = None if value is None else MathObject._color_array(value, len(self._points))
+        self._invalidate()
+
+    @property
+    def size(self):
+        return self._size
+
+    @size.setter
+    def size(self, value):
+        self._size = value
+        self._invalidate()
+
+    def __len__(self):
+        return len(self._points)
+
+    def __getitem__(self, key):
+        """An int gives a Point; a slice, index array or boolean mask gives a PointCloud."""
+        if isinstance(key, (int, np.integer)):
+            p = Point(*self._points.array[key].tolist())
+            if self._colors is not None:
+                p._color = str(self._colors[key])
+            return p
+        result = PointCloud(self._points.array[key], size=self._size)
+        result._colors = None if self._colors is None else self._colors[key]
+        return result
+
+    def _offsets(self, other):
+        if isinstance(other, VectorArray):
+            return other._components
+        if isinstance(other, Vector):
+            return np.array(other._vector, dtype=np.float64)
+        return np.asarray(other, dtype=np.float64)
+
+    def __add__(self, other):
+        # moves the points by a Vector, a VectorArray (one vector per point) or an (N,2) array
+        if isinstance(other, (VectorArray, Vector, np.ndarray)):
+            return self._with(self._points.array + self._offsets(other))
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        # PointCloud - PointCloud gives the VectorArray from each point of 'other' to the matching point of this one
+        if isinstance(other, PointCloud):
+            return VectorArray(self._points.array - other._points.array, other._points.array)
+        if isinstance(other, (VectorArray, Vector, np.ndarray)):
+            return self._with(self._points.array - self._offsets(other))
+        return NotImplemented
+
+    def _compute_bounds(self):
+        if len(self._points) == 0:
+            return None
+        array = self._points.array
+        return tuple(array.min(axis=0).tolist() + array.max(axis=0).tolist())
+
+    def _release(self):
+        if self._materialized:
+            self._canvas.delete(self._tag())
+        super()._release()
+
+    def _owned_items(self):
+        items = super()._owned_items()
+        if self._materialized:
+            items += self._canvas.find_withtag(self._tag())
+        return items
+
+    def _geometry_bytes(self):
+        return self._points.nbytes + (0 if self._colors is None else self._colors.nbytes)
+
+    def _tag(self):
+        """Canvas tag of the points (they are deleted with one call)."""
+        return f"mathobject{id(self)}"
+
+    def _render(self):
+        n = len(self._points)
+        if n == 0:
+            return
+
+        transform = self._screen_transform()
+        points_transformed = transform._apply_array(self._points.array)
+
+        # points that land on the same pixel as an earlier point of the same color would just be drawn over it, skip them
+        if self._colors is None:
+            codes = np.zeros(n, dtype=np.int64)
+        else:
+            if len(self._colors) != n:
+                raise ValueError(f"PointCloud has {n} points but {len(self._colors)} colors")
+            _, codes = np.unique(self._colors, return_inverse=True)
+        pixels = np.rint(points_transformed).astype(np.int64)
+        _, first = np.unique(np.column_stack((pixels, codes.reshape(-1))), axis=0, return_index=True)
+        first.sort() # keep the drawing order
+
+        r = self._size / 2
+        create_oval = self._canvas.create_oval
+        tag = self._tag()
+        corners = np.column_stack((points_transformed[first] - r, points_transformed[first] + r)).tolist()
+        if self._colors is None:
+            color = self.color
+            for x0, y0, x1, y1 in corners:
+                create_oval(x0, y0, x1, y1, fill=color, outline=color, tags=tag)
+        else:
+            for (x0, y0, x1, y1), color in zip(corners, self._colors[first].tolist()):
+                create_oval(x0, y0, x1, y1, fill=color, outline=color, tags=tag)
+
+        if self._label is not None:
+            x, y = transform._apply_point(*self._points.array.mean(axis=0).tolist())
+            t = self._canvas.create_text(x + 10, y + 10, text=self._label, font=LABEL_FONT, fill=self.color)
+            self._canvas_items.append(t)
@@ -1,12 +1,15 @@
 from mathobject import MathObject
-import config
 from config import LABEL_FONT
-from vector import Vector
-import math
+from pointbuffer import PointBuffer
+from ellipse import Ellipse
 
 class Polygon(MathObject):
     """A polygon."""
 
+    __slots__ = ("_points",)
+
+    DRAGGABLE = True
+
     @staticmethod
     def rectangle(x,y,w,h):
         return Polygon([(x,y), (x+w,y), (x+w,y+h), (x,y+h)])
@@ -17,17 +20,11 @@ class Polygon(MathObject):
     
     @staticmethod
     def circle(x,y,r):
-        # circumference = 2 * math.pi * r
-        # K = 10
-        # num_segments =  int(circumference / K)
-        num_segments = 100
-        points = []
-        for i in range(num_segments):
-            angle = i / num_segments * (2 * math.pi)
-            px = r * math.cos(angle) + x
-            py = r * math.sin(angle) + y
-            points.append((px,py))
-        return Polygon(points)
+        """Returns an Ellipse (an exact circle, which is split into as many segments as its size on screen needs when it is drawn).
+
+        Transforms work on it like on a Polygon (apply() and apply_in_place() too), and to_polygon() turns it into one.
+        """
+        return Ellipse.circle(x,y,r)
 
     @staticmethod
     def triangle(x,y,w,h):
@@ -35,29 +32,42 @@ class Polygon(MathObject):
 
     def __init__(self, points, label=None):
         super().__init__()
-        self._points = points
+        self._points = PointBuffer(points) # (N,2) array of the points, in grid space
         self._label = label
-        self._points_transformed = [config.command_interpretter.initial_transform * Vector(p[0], p[1]) for p in self._points]
 
     def copy(self):
-        return Polygon(self._points)
+        return Polygon(self._points.copy())
+
+    def _geometry_bytes(self):
+        return self._points.nbytes
+
+    def _handles(self):
+        # the vertices
+        return self._points.array
+
+    def _drag_handle(self, handle, x, y):
+        self._points.array[handle] = (x, y)
+        self._invalidate()
 
-    def draw(self):
-        super().draw()
+    def _compute_bounds(self):
+        if len(self._points) == 0:
+            return None
+        array = self._points.array
+        return tuple(array.min(axis=0).tolist() + array.max(axis=0).tolist())
 
-        self._points_transformed = [config.command_interpretter.initial_transform * Vector(p[0], p[1]) for p in self._points]
-        
-        xys = [p for pt in self._points_transformed for p in pt]
+    def _render(self):
+        # transform all points (that are far enough apart on screen to matter) to canvas space in one go
+        transform = self._screen_transform()
+        points_transformed = transform._apply_array(self._decimated(self._points.array, transform))
         p = self._canvas.create_polygon(
-            *xys,
-            fill=self._color
+            points_transformed.ravel().tolist(),
+            fill=self.color
         )
         self._canvas_items.append(p)
 
         if self._label is not None:
-            text_x = sum([p[0] for p in self._points]) / len(self._points)
-            text_y = sum([p[1] for p in self._points]) / len(self._points)
-            pt_transformed = config.command_interpretter.initial_transform * Vector(text_x, text_y)
+            text_x, text_y = self._points.array.mean(axis=0)
+            pt_transformed = transform._apply_point(text_x, text_y)
             t = self._canvas.create_text(
                 pt_transformed[0],
                 pt_transformed[1],
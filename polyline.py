@@ -1,53 +1,264 @@
 from mathobject import MathObject
 import config
 from config import LABEL_FONT
-from vector import Vector
+from pointbuffer import PointBuffer
+import collections
+import math
+import tkinter as tk
 
 class Polyline(MathObject):
-    """A polyline."""
+    """A polyline.
 
-    def __init__(self, points=None, label=None):
+    A polyline that add() grows (e.g. an animation's trail) can be bounded, so that it doesn't use more and more memory:
+    'max_points' keeps only the last that many points, 'max_age' only the points added in the last that many seconds
+    (of animation time, checked on add()). 'tolerance' simplifies the polyline as points are added: a point that is
+    (nearly) in line with the last segment extends that segment instead of adding a new one, as long as every point it
+    replaced stays within 'tolerance' (in grid units) of the segment.
+    """
+
+    __slots__ = ("_points", "_chunks", "_label_item", "_sum", "_dropped", "_max_points", "_max_age", "_times", "_tolerance", "_cone")
+
+    CHUNK_SIZE = 64 # max number of points in the canvas line that add() extends (a new line is started when it is full)
+
+    def __init__(self, points=None, label=None, max_points=None, max_age=None, tolerance=None):
         super().__init__()
-        if points is None:
-            points = []
-        self._points = points
+        if max_points is not None and max_points < 2:
+            raise ValueError("max_points must be at least 2")
         self._label = label
-        self._points_transformed = [config.command_interpretter.initial_transform * Vector(p[0], p[1]) for p in self._points]
+        self._chunks = collections.deque() # [canvas line, index of its first point] of the lines the polyline is drawn with (add() extends the last one in place)
+        self._label_item = None
+        self._sum = (0.0, 0.0) # sum of the points drawn so far (so the label can be positioned without summing every point)
+        self._dropped = 0 # number of points dropped from the front so far (point indices in _chunks count them too)
+        self._max_points = max_points
+        self._max_age = max_age
+        self._times = collections.deque() if max_age is not None else None # when each point was added (in animation time)
+        self._tolerance = tolerance
+        self._cone = None # state of the last segment, for merging points into it (see _merges())
+
+        if max_points is None and max_age is None and tolerance is None:
+            self._points = PointBuffer(points) # (N,2) array of the points, in grid space
+        else:
+            self._points = PointBuffer()
+            for point in PointBuffer.as_array(points).tolist():
+                self.add(point)
 
     def copy(self):
-        return Polyline(self._points)
-    
+        copy = Polyline(self._points.copy())
+        copy._max_points, copy._max_age, copy._tolerance = self._max_points, self._max_age, self._tolerance
+        if self._times is not None:
+            copy._times = collections.deque(self._times)
+        return copy
+
     def add(self, point):
-        """Adds a point to the polyline."""
-        self._points.append(point)
-        self._points_transformed.append(config.command_interpretter.initial_transform * Vector(point[0], point[1]))
-        self.redraw()
+        """Adds a point to the polyline.
+
+        If the polyline is drawn, only the end of it is updated on the canvas (the whole polyline is not redrawn). For
+        a bounded polyline, the points that are too many or too old are removed from its start.
+        """
+        x, y = float(point[0]), float(point[1])
+        self._lod = None
+        merged = self._merges(x, y)
+        if merged:
+            last_x, last_y = self._points[-1]
+            self._points.array[-1] = (x, y)
+            self._sum = (self._sum[0] - last_x, self._sum[1] - last_y) # (_draw_appended() adds the new point)
+        else:
+            self._points.append((x, y))
+            self._start_segment()
+        if self._times is not None:
+            if merged:
+                self._times.pop()
+            self._times.append(self._now())
+
+        # grow the bounds to include the point (rather than recomputing them from all points)
+        if self._bounds is not None:
+            b = self._bounds
+            self._bounds = (min(b[0], x), min(b[1], y), max(b[2], x), max(b[3], y))
+
+        dropped = self._drop_old()
+        if self._materialized:
+            if dropped:
+                self._draw_dropped()
+            self._draw_appended(merged)
+        self._bounds_changed()
 
-    def draw(self):
-        super().draw()
+    def _now(self):
+        return config.command_interpretter.elapsed if config.command_interpretter is not None else 0.0
 
-        self._points_transformed = [config.command_interpretter.initial_transform * Vector(p[0], p[1]) for p in self._points]
+    def _merges(self, x, y):
+        """Whether (x,y) can replace the last point, i.e. every point since the second to last one (which it replaces)
+        stays within 'tolerance' of the segment from the second to last point to (x,y).
 
+        The directions from the second to last point that pass within 'tolerance' of each replaced point form a cone
+        (intersected as points are merged), so this is O(1) no matter how many points were merged.
+        """
+        if self._cone is None:
+            return False
+        ax, ay, base, low, high, reach = self._cone
+        dx, dy = x - ax, y - ay
+        distance = math.hypot(dx, dy)
+        if distance < reach: # (the segment would have to turn back)
+            return False
+        offset = (math.atan2(dy, dx) - base + math.pi) % (2 * math.pi) - math.pi
+        if not low <= offset <= high:
+            return False
+        spread = math.asin(self._tolerance / distance) if distance > self._tolerance else math.pi
+        self._cone = (ax, ay, base, max(low, offset - spread), min(high, offset + spread), distance)
+        return True
+
+    def _start_segment(self):
+        """Starts a new cone for the segment that ends at the last point (see _merges())."""
+        if self._tolerance is None or len(self._points) < 2:
+            self._cone = None
+            return
+        (ax, ay), (x, y) = self._points[-2], self._points[-1]
+        distance = math.hypot(x - ax, y - ay)
+        spread = math.asin(self._tolerance / distance) if distance > self._tolerance else math.pi
+        self._cone = (ax, ay, math.atan2(y - ay, x - ax), -spread, spread, distance)
+
+    def _drop_old(self):
+        """Removes the points that are too many or too old (for a bounded polyline). Returns how many were removed."""
+        count = 0
+        if self._max_points is not None:
+            count = max(len(self._points) - self._max_points, 0)
+        if self._times is not None:
+            for _ in range(count):
+                self._times.popleft()
+            oldest = self._now() - self._max_age
+            while self._times and self._times[0] < oldest:
+                self._times.popleft()
+                count += 1
+        if count == 0:
+            return 0
+
+        # (usually just one point is dropped per add(), so this is plain python rather than numpy)
+        sum_x, sum_y = self._sum
+        b = self._bounds
+        for x, y in self._points.array[:count].tolist():
+            sum_x, sum_y = sum_x - x, sum_y - y
+            if b is not None and (x == b[0] or y == b[1] or x == b[2] or y == b[3]):
+                b = None # (a point on the edge of the bounds is gone, so they may have shrunk and have to be recomputed)
+        self._sum = (sum_x, sum_y)
+        self._bounds = b
+        self._points.drop_front(count)
+        self._dropped += count
         if len(self._points) < 2:
+            self._cone = None
+        return count
+
+    def _draw_dropped(self):
+        """Removes the dropped points from the start of the drawn polyline (deleting the lines that only had dropped points)."""
+        first = self._dropped # index of the first point that is left
+        while self._chunks and (len(self._chunks) > 1 and self._chunks[1][1] <= first or len(self._points) < 2):
+            self._delete_line(self._chunks.popleft()[0])
+        if self._chunks and self._chunks[0][1] < first:
+            chunk = self._chunks[0]
+            chunk[1] = first
+            end = self._chunks[1][1] + 1 if len(self._chunks) > 1 else None
+            self._set_line_points(chunk[0], first - self._dropped, None if end is None else end - self._dropped)
+
+    def _draw_appended(self, merged):
+        """Extends the drawn polyline to include the last added point (or moves its end, if the point was merged into
+        the last segment).
+        """
+        n = len(self._points)
+        x, y = self._points[n - 1]
+        self._sum = (self._sum[0] + x, self._sum[1] + y)
+        if n < 2:
             return
-        
-        xys = [p for pt in self._points_transformed for p in pt]
+
+        # extend the last line in place, or start a new one (at the previous point, so they connect) once it is full.
+        # this keeps the cost of an add() independent of the number of points
+        if self._chunks and self._dropped + n - self._chunks[-1][1] <= Polyline.CHUNK_SIZE:
+            chunk = self._chunks[-1]
+            self._set_line_points(chunk[0], chunk[1] - self._dropped, None)
+        else:
+            if self._chunks and merged: # (the full line ends at the point that was replaced, so it ends at the previous point now)
+                chunk = self._chunks[-1]
+                self._set_line_points(chunk[0], chunk[1] - self._dropped, n - 1)
+            start = self._dropped + n - 2
+            self._chunks.append([self._create_line(self._screen_transform()._apply_array(self._points.array[n - 2 :])), start])
+            if self._label_item is not None:
+                self._canvas.tag_raise(self._label_item)
+
+        self._draw_label()
+
+    def _set_line_points(self, item, start, end):
+        """Sets the points of a drawn line to the points from index 'start' to 'end' (exclusive, None for the last point)."""
+        points_transformed = self._screen_transform()._apply_array(self._points.array[start:end])
+        self._canvas.coords(item, points_transformed.ravel().tolist())
+
+    def _create_line(self, points_transformed):
+        """Creates a canvas line through the given (N,2) array of canvas space points."""
         p = self._canvas.create_line(
-            *xys,
-            fill=self._color,
-            width=self.line_width
+            points_transformed.ravel().tolist(),
+            fill=self.color,
+            width=self.line_width,
+            capstyle=tk.ROUND, # so that consecutive lines join seamlessly
         )
         self._canvas_items.append(p)
+        return p
+
+    def _delete_line(self, item):
+        self._canvas.delete(item)
+        self._canvas_items.remove(item)
+
+    def _draw_label(self):
+        """Creates (or moves) the label, which sits at the average of the points."""
+        if self._label is None or len(self._points) < 2:
+            return
+
+        n = len(self._points)
+        text_x, text_y = self._sum[0] / n, self._sum[1] / n
+        pt_transformed = self._screen_transform()._apply_point(text_x, text_y)
+        if self._label_item is not None:
+            self._canvas.coords(self._label_item, pt_transformed[0], pt_transformed[1])
+            return
+
+        self._label_item = self._canvas.create_text(
+            pt_transformed[0],
+            pt_transformed[1],
+            text=self._label,
+            font=LABEL_FONT,
+            fill=self.color,
+        )
+        self._canvas_items.append(self._label_item)
+
+    def _invalidate(self):
+        self._cone = None # (the points changed, e.g. transformed in place, so the last segment's cone is wrong)
+        super()._invalidate()
+
+    def _geometry_bytes(self):
+        return self._points.nbytes
+
+    def _compute_bounds(self):
+        if len(self._points) == 0:
+            return None
+        array = self._points.array
+        return tuple(array.min(axis=0).tolist() + array.max(axis=0).tolist())
+
+    def _render(self):
+        self._chunks.clear()
+        self._label_item = None
+        self._sum = tuple(self._points.array.sum(axis=0).tolist())
+        n = len(self._points)
+        if n < 2:
+            return
+
+        # transform all points to canvas space in one go
+        transform = self._screen_transform()
+        if self._max_points is None and self._max_age is None:
+            # one line through the points that are far enough apart on screen to matter, except for the last
+            # CHUNK_SIZE points, which get a line of their own (so add() only has to extend a short line)
+            tail = max(n - Polyline.CHUNK_SIZE, 0)
+            if tail > 0:
+                self._chunks.append([self._create_line(transform._apply_array(self._decimated(self._points.array[: tail + 1], transform))), self._dropped])
+            self._chunks.append([self._create_line(transform._apply_array(self._points.array[tail:])), self._dropped + tail])
+        else:
+            points_transformed = transform._apply_array(self._points.array)
+            # bounded polylines lose points at their start, so they are drawn in chunks (lines of up to CHUNK_SIZE
+            # points, each starting at the last point of the previous one) that can be trimmed or deleted cheaply
+            for start in range(0, n - 1, Polyline.CHUNK_SIZE - 1):
+                self._chunks.append([self._create_line(points_transformed[start : start + Polyline.CHUNK_SIZE]), self._dropped + start])
 
-        if self._label is not None:
-            text_x = sum([p[0] for p in self._points]) / len(self._points)
-            text_y = sum([p[1] for p in self._points]) / len(self._points)
-            pt_transformed = config.command_interpretter.initial_transform * Vector(text_x, text_y)
-            t = self._canvas.create_text(
-                pt_transformed[0],
-                pt_transformed[1],
-                text=self._label,
-                font=LABEL_FONT,
-                fill=self._color,
-            )
-            self._canvas_items.append(t)
\ No newline at end of file
+        self._draw_label()
@@ -0,0 +1,97 @@
+import collections
+import contextlib
+import functools
+import json
+import time
+
+HISTORY = 30 # seconds of spans that are kept (for save_trace())
+OVERLAY_INTERVAL = 0.5 # seconds between overlay updates (its numbers are averages over this time)
+OVERLAY_FONT = ("Courier", "10")
+
+_DISABLED = contextlib.nullcontext() # the span() of a disabled profiler
+
+class Profiler:
+    """Times what happens in each frame (on_update(), redrawing objects, drawing the grid, Tk's rendering, etc).
+
+    Code to time is wrapped in 'with profiler.span(name):'. When the profiler is disabled, span() just returns a shared
+    do-nothing context manager, so the instrumented code costs close to nothing. When enabled, the spans of the last
+    HISTORY seconds are kept; they can be shown as an overlay on the canvas (FPS and milliseconds per frame of each kind
+    of span) and saved as a Chrome trace (open it in chrome://tracing or https://ui.perfetto.dev).
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.show_overlay = False
+        self._spans = collections.deque() # (name, start, duration) of the finished spans, in nanoseconds
+        self._frames = collections.deque() # end times of the frames in the last OVERLAY_INTERVAL seconds, in nanoseconds
+        self._totals = collections.Counter() # name -> nanoseconds spent in its spans since the last overlay update
+        self._overlay_time = 0 # when the overlay was last updated
+        self._overlay_text = ""
+
+    @staticmethod
+    def timed(name):
+        """Decorator that times every call of a method as a span called 'name' (the method's object must have a 'profiler')."""
+        def decorator(method):
+            @functools.wraps(method)
+            def timed_method(self, *args, **kwargs):
+                if not self.profiler.enabled:
+                    return method(self, *args, **kwargs)
+                with self.profiler._span(name):
+                    return method(self, *args, **kwargs)
+            return timed_method
+        return decorator
+
+    def span(self, name):
+        """Returns a context manager that times the code in its 'with' block as a span called 'name'."""
+        if not self.enabled:
+            return _DISABLED
+        return self._span(name)
+
+    @contextlib.contextmanager
+    def _span(self, name):
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter_ns() - start
+            self._spans.append((name, start, duration))
+            self._totals[name] += duration
+
+    def frame_done(self, canvas):
+        """Called at the end of each frame: forgets old spans and updates the overlay (on 'canvas')."""
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        self._frames.append(now)
+        while self._spans and self._spans[0][1] < now - HISTORY * 1e9:
+            self._spans.popleft()
+
+        if now - self._overlay_time >= OVERLAY_INTERVAL * 1e9:
+            while self._frames and self._frames[0] < now - OVERLAY_INTERVAL * 1e9:
+                self._frames.popleft()
+            frames = max(len(self._frames), 1)
+            phases = "  ".join(f"{name} {total / frames / 1e6:.1f}ms" for name, total in sorted(self._totals.items()))
+            self._overlay_text = f"{len(self._frames) / OVERLAY_INTERVAL:.0f} fps  {phases}"
+            self._totals.clear()
+            self._overlay_time = now
+            self.draw_overlay(canvas)
+
+    def draw_overlay(self, canvas):
+        """Shows (or, if show_overlay is False, hides) the overlay in the top left corner of the view."""
+        canvas.delete("profiler")
+        if self.enabled and self.show_overlay and self._overlay_text:
+            canvas.create_text(
+                canvas.canvasx(10), canvas.canvasy(10), text=self._overlay_text, anchor="nw", font=OVERLAY_FONT, fill="#000", tags="profiler"
+            )
+
+    def save_trace(self, path, seconds=10):
+        """Saves the spans of the last 'seconds' seconds as a Chrome trace-event JSON file."""
+        since = time.perf_counter_ns() - seconds * 1e9
+        events = [
+            {"name": name, "ph": "X", "ts": start / 1000, "dur": duration / 1000, "pid": 1, "tid": 1}
+            for name, start, duration in self._spans
+            if start >= since
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
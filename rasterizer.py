@@ -0,0 +1,258 @@
+import math
+import struct
+import zlib
+import numpy as np
+
+# colors that can be referred to by name (the same values as Tk's, which come from X11)
+COLOR_NAMES = {
+    "black": "#000000",
+    "white": "#ffffff",
+    "red": "#ff0000",
+    "green": "#00ff00",
+    "blue": "#0000ff",
+    "yellow": "#ffff00",
+    "cyan": "#00ffff",
+    "magenta": "#ff00ff",
+    "orange": "#ffa500",
+    "purple": "#a020f0",
+    "pink": "#ffc0cb",
+    "brown": "#a52a2a",
+    "gray": "#bebebe",
+    "grey": "#bebebe",
+    "darkgray": "#a9a9a9",
+    "darkgrey": "#a9a9a9",
+    "lightgray": "#d3d3d3",
+    "lightgrey": "#d3d3d3",
+    "darkred": "#8b0000",
+    "darkgreen": "#006400",
+    "darkblue": "#00008b",
+    "lightblue": "#add8e6",
+    "lightgreen": "#90ee90",
+    "navy": "#000080",
+    "maroon": "#b03060",
+    "olive": "#808000",
+    "teal": "#008080",
+    "violet": "#ee82ee",
+    "gold": "#ffd700",
+    "silver": "#c0c0c0",
+    "turquoise": "#40e0d0",
+    "salmon": "#fa8072",
+    "skyblue": "#87ceeb",
+    "steelblue": "#4682b4",
+    "crimson": "#dc143c",
+    "indigo": "#4b0082",
+    "coral": "#ff7f50",
+    "khaki": "#f0e68c",
+    "tan": "#d2b48c",
+}
+
+ARROW_SHAPE = (8, 10, 3) # Tk's default arrow shape (neck to tip, trailing points to tip, trailing points to edge of line)
+
+class Rasterizer:
+    """Draws lines, polygons and ovals into an RGB image (a numpy array), without Tk.
+
+    Coordinates are in pixels. Shapes are antialiased by drawing at 'supersampling' times the resolution and averaging.
+    Text is not supported (use SVG output if you need labels).
+    """
+
+    @staticmethod
+    def parse_color(color):
+        """Converts a Tk color ('#rgb', '#rrggbb' or a name such as 'red') to an (r, g, b) tuple. Returns None for '' (transparent)."""
+        if not color:
+            return None
+        color = COLOR_NAMES.get(color.lower().replace(" ", ""), color)
+        if color.startswith("#"):
+            digits = color[1:]
+            n = len(digits) // 3
+            if n > 0 and len(digits) == 3 * n:
+                try:
+                    return tuple(int(digits[i * n : (i + 1) * n], 16) * 255 // (16**n - 1) for i in range(3))
+                except ValueError:
+                    pass
+        return (0, 0, 0) # unknown color
+
+    def __init__(self, width, height, background="#ffffff", supersampling=3):
+        self._width = width
+        self._height = height
+        self._ss = supersampling
+        rgb = Rasterizer.parse_color(background)
+        if rgb[0] == rgb[1] == rgb[2]:
+            self._image = np.full((height * supersampling, width * supersampling, 3), rgb[0], dtype=np.uint8)
+        else:
+            self._image = np.empty((height * supersampling, width * supersampling, 3), dtype=np.uint8)
+            self._image[:] = rgb
+
+    def line(self, coords, color, width=1.0, arrow=None):
+        """Draws a polyline through 'coords' (x1, y1, x2, y2, ...). 'arrow' can be None, 'first', 'last' or 'both'."""
+        rgb = Rasterizer.parse_color(color)
+        points = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        if rgb is None or len(points) < 2:
+            return
+        width = max(float(width), 1.0)
+
+        # arrow heads are filled polygons, and the line stops at their neck (like Tk)
+        if arrow in ("last", "both"):
+            points = points.copy()
+            points[-1] = self._arrow_head(points[-2], points[-1], width, rgb)
+        if arrow in ("first", "both"):
+            points = points.copy()
+            points[0] = self._arrow_head(points[1], points[0], width, rgb)
+
+        self._stroke(points * self._ss, width * self._ss, rgb)
+
+    def _arrow_head(self, start, tip, width, rgb):
+        """Draws an arrow head at 'tip' for a line coming from 'start'. Returns the position of the arrow head's neck."""
+        d1, d2, d3 = ARROW_SHAPE
+        direction = tip - start
+        length = math.hypot(direction[0], direction[1])
+        if length == 0:
+            return tip
+        direction = direction / length
+        normal = np.array([-direction[1], direction[0]])
+        half = d3 + width / 2
+        neck = tip - direction * d1
+        trailing = tip - direction * d2
+        self.polygon(np.array([tip, trailing + normal * half, neck, trailing - normal * half]).ravel(), None, rgb)
+        return neck
+
+    def _stroke(self, points, width, rgb):
+        """Draws a polyline (in supersampled pixels) by stamping a disc of diameter 'width' along it."""
+        h, w = self._image.shape[:2]
+
+        # horizontal and vertical lines (e.g. the grid) are just rectangles
+        if len(points) == 2 and (points[0, 0] == points[1, 0] or points[0, 1] == points[1, 1]):
+            radius = width / 2
+            x0, x1 = sorted((points[0, 0], points[1, 0]))
+            y0, y1 = sorted((points[0, 1], points[1, 1]))
+            if x0 == x1:
+                x0, x1 = x0 - radius, x1 + radius
+            else:
+                y0, y1 = y0 - radius, y1 + radius
+            c0, c1 = int(np.clip(np.ceil(x0 - 0.5), 0, w)), int(np.clip(np.ceil(x1 - 0.5), 0, w))
+            r0, r1 = int(np.clip(np.ceil(y0 - 0.5), 0, h)), int(np.clip(np.ceil(y1 - 0.5), 0, h))
+            self._image[r0:r1, c0:c1] = rgb
+            return
+
+        a = points[:-1]
+        b = points[1:]
+        lengths = np.hypot(b[:, 0] - a[:, 0], b[:, 1] - a[:, 1])
+        counts = np.maximum(np.ceil(lengths / 0.5).astype(np.int64), 1) # a sample every half pixel
+
+        # sample positions along every segment at once
+        segment = np.repeat(np.arange(len(a)), counts)
+        t = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)) / np.repeat(counts, counts)
+        samples = a[segment] + (b - a)[segment] * t[:, None]
+        samples = np.vstack([samples, points[-1:]])
+
+        radius = width / 2
+        reach = int(math.ceil(radius))
+        inside = (
+            (samples[:, 0] > -reach - 1) & (samples[:, 0] < w + reach + 1) & (samples[:, 1] > -reach - 1) & (samples[:, 1] < h + reach + 1)
+        )
+        xs = np.floor(samples[inside, 0]).astype(np.int64)
+        ys = np.floor(samples[inside, 1]).astype(np.int64)
+        for dy in range(-reach, reach + 1):
+            for dx in range(-reach, reach + 1):
+                if dx * dx + dy * dy > radius * radius:
+                    continue
+                px = xs + dx
+                py = ys + dy
+                ok = (px >= 0) & (px < w) & (py >= 0) & (py < h)
+                self._image[py[ok], px[ok]] = rgb
+
+    def polygon(self, coords, color, rgb=None):
+        """Fills the polygon with vertices 'coords' (x1, y1, x2, y2, ...), using the even-odd rule."""
+        if rgb is None:
+            rgb = Rasterizer.parse_color(color)
+        points = np.asarray(coords, dtype=np.float64).reshape(-1, 2) * self._ss
+        if rgb is None or len(points) < 3:
+            return
+
+        h, w = self._image.shape[:2]
+        p = points
+        q = np.roll(points, -1, axis=0)
+        top = np.minimum(p[:, 1], q[:, 1])
+        bottom = np.maximum(p[:, 1], q[:, 1])
+
+        # each edge crosses the centers of rows first_row .. last_row - 1
+        first_row = np.clip(np.ceil(top - 0.5), 0, h).astype(np.int64)
+        last_row = np.clip(np.ceil(bottom - 0.5), 0, h).astype(np.int64)
+        counts = last_row - first_row
+        edge = np.repeat(np.arange(len(p)), counts)
+        if len(edge) == 0:
+            return
+        rows = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + first_row[edge]
+
+        # x position of every (edge, row) crossing, sorted by row then x
+        y = rows + 0.5
+        dy = q[edge, 1] - p[edge, 1]
+        xs = p[edge, 0] + (y - p[edge, 1]) * (q[edge, 0] - p[edge, 0]) / dy
+        order = np.lexsort((xs, rows))
+        rows = rows[order]
+        xs = xs[order]
+
+        # consecutive crossings on a row bound a filled span
+        starts = np.clip(np.ceil(xs[0::2] - 0.5), 0, w).astype(np.int64)
+        ends = np.clip(np.ceil(xs[1::2] - 0.5), 0, w).astype(np.int64)
+        span_rows = rows[0::2]
+        lengths = np.maximum(ends - starts, 0)
+        span = np.repeat(np.arange(len(starts)), lengths)
+        px = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths) + starts[span]
+        self._image[span_rows[span], px] = rgb
+
+    def oval(self, x0, y0, x1, y1, color):
+        """Fills the ellipse inscribed in the rectangle (x0, y0, x1, y1)."""
+        rgb = Rasterizer.parse_color(color)
+        if rgb is None:
+            return
+        s = self._ss
+        x0, x1 = sorted((x0 * s, x1 * s))
+        y0, y1 = sorted((y0 * s, y1 * s))
+        h, w = self._image.shape[:2]
+        c0, c1 = max(int(math.floor(x0)), 0), min(int(math.ceil(x1)), w)
+        r0, r1 = max(int(math.floor(y0)), 0), min(int(math.ceil(y1)), h)
+        if c0 >= c1 or r0 >= r1:
+            return
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        rx, ry = max((x1 - x0) / 2, 0.5), max((y1 - y0) / 2, 0.5)
+        xs = (np.arange(c0, c1) + 0.5 - cx) / rx
+        ys = (np.arange(r0, r1) + 0.5 - cy) / ry
+        mask = xs[None, :] ** 2 + ys[:, None] ** 2 <= 1
+        self._image[r0:r1, c0:c1][mask] = rgb
+
+    def image(self):
+        """Returns the (height, width, 3) uint8 RGB image."""
+        s = self._ss
+        if s == 1:
+            return self._image.copy()
+        # sum each s x s block: first the s rows of every block, then the s columns
+        rows = self._image.reshape(self._height, s, self._width * s * 3)
+        row_sum = rows[:, 0].astype(np.uint16)
+        for dy in range(1, s):
+            row_sum += rows[:, dy]
+        row_sum = row_sum.reshape(self._height, self._width, s, 3)
+        total = row_sum[:, :, 0].copy()
+        for dx in range(1, s):
+            total += row_sum[:, :, dx]
+        return ((total + s * s // 2) // (s * s)).astype(np.uint8)
+
+    def png_bytes(self):
+        """Returns the image encoded as a PNG file."""
+        return Rasterizer.encode_png(self.image())
+
+    @staticmethod
+    def encode_png(image):
+        """Encodes a (height, width, 3) uint8 RGB image as a PNG file."""
+        height, width = image.shape[:2]
+        raw = np.zeros((height, 1 + width * 3), dtype=np.uint8) # each row starts with filter type 0 (none)
+        raw[:, 1:] = image.reshape(height, width * 3)
+
+        def chunk(kind, data):
+            return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+        return (
+            b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6))
+            + chunk(b"IEND", b"")
+        )
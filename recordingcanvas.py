@@ -0,0 +1,44 @@
+from collections import Counter
+from headlesscanvas import HeadlessCanvas
+
+RECORDED_METHODS = (
+    "create_line",
+    "create_polygon",
+    "create_oval",
+    "create_text",
+    "coords",
+    "itemconfig",
+    "delete",
+    "scale",
+    "move",
+    "tag_lower",
+    "tag_raise",
+)
+
+class RecordingCanvas(HeadlessCanvas):
+    """A HeadlessCanvas that also counts how many times each canvas method is called (used by benchmark.py).
+
+    Counting the canvas calls an operation makes shows how much work it would hand to Tk, which is usually where the
+    time goes in the real program.
+    """
+
+    def __init__(self, width=800, height=600, background="#ffffff"):
+        super().__init__(width, height, background)
+        self.calls = Counter() # method name -> number of calls
+
+    def reset_calls(self):
+        self.calls.clear()
+
+def _recorded(name):
+    method = getattr(HeadlessCanvas, name)
+
+    def record(self, *args, **options):
+        self.calls[name] += 1
+        return method(self, *args, **options)
+
+    record.__name__ = name
+    record.__doc__ = method.__doc__
+    return record
+
+for _name in RECORDED_METHODS:
+    setattr(RecordingCanvas, _name, _recorded(_name))
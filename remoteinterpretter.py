@@ -0,0 +1,223 @@
+import tkinter as tk
+import multiprocessing
+import traceback
+import signal
+import sys
+import numpy as np
+from multiprocessing import shared_memory
+import streamcanvas
+from streamcanvas import StreamCanvas
+
+POLL_INTERVAL = 5 # milliseconds between checks for new frames from the script process
+ZOOM_STEP = 1.1 # zoom factor per mouse wheel notch (same as CommandInterpretter)
+
+class RemoteInterpretter:
+    """Runs scripts in a separate process, so that a slow (or endless) script doesn't freeze the window and can be stopped.
+
+    Has the same interface as CommandInterpretter (which does the actual work, in the script process, on a
+    StreamCanvas). The script process sends what it draws as frames of draw commands, whose coordinates are published
+    through shared memory; they are replayed here on the real canvas. Panning happens here (so it stays smooth while a
+    script is busy), and view changes are sent to the script process.
+    """
+
+    def __init__(self, canvas: tk.Canvas):
+        self._canvas = canvas
+        self._items = {} # script process item id -> canvas item id
+        self._shared = {} # name -> attached shared memory block
+        self._process = None
+        self._connection = None
+        self._view_sent = False # a view change was sent and no frame came back yet
+        self._view_outdated = False # the view changed again since then
+        self._start()
+
+        self._canvas.bind("<Configure>", lambda e: self._send_view())
+        self._canvas.bind("<ButtonPress-3>", self.scroll_start)
+        self._canvas.bind("<ButtonPress-2>", self.scroll_start)
+        self._canvas.bind("<B3-Motion>", self.scroll_move)
+        self._canvas.bind("<B2-Motion>", self.scroll_move)
+        self._canvas.bind("<MouseWheel>", self._on_mousewheel)
+        self._canvas.bind("<ButtonPress-1>", lambda e: self._send_pointer("press", e))
+        self._canvas.bind("<B1-Motion>", lambda e: self._send_pointer("move", e))
+        self._canvas.bind("<ButtonRelease-1>", lambda e: self._send_pointer("release", e))
+
+        self._canvas.after(POLL_INTERVAL, self._poll)
+
+    def _start(self):
+        """Starts a script process (with an empty scene)."""
+        context = multiprocessing.get_context("spawn") # (a forked Tk process is unusable)
+        self._connection, child_connection = context.Pipe()
+        self._process = context.Process(target=_serve, args=(child_connection,), daemon=True)
+        self._process.start()
+        child_connection.close()
+        self._view_sent = False
+        self._send_view()
+
+    def stop(self):
+        """Kills the running script (and its on_update()), and starts over with an empty scene."""
+        self._process.kill()
+        self._process.join()
+        self._connection.close()
+        for shared in self._shared.values():
+            shared.close()
+            try:
+                shared.unlink() # (the killed process can't)
+            except FileNotFoundError:
+                pass
+        self._shared.clear()
+        self._canvas.delete("all")
+        self._items.clear()
+        self._start()
+
+    def execute_script(self, text, restart=False):
+        """Runs the given text as Python code (in the script process), see CommandInterpretter.execute_script()."""
+        self._send(("execute", text, restart))
+
+    def execute_commands_immediate(self, text):
+        """Runs the given text as Python code (in the script process). Does not clear the variables first."""
+        self._send(("immediate", text))
+
+    def _send(self, message):
+        try:
+            self._connection.send(message)
+        except (BrokenPipeError, OSError):
+            pass # the process died, _poll() restarts it
+
+    def _send_view(self):
+        # while the script process is busy, only the latest view change is sent (so the pipe can't fill up)
+        if self._view_sent:
+            self._view_outdated = True
+            return
+        self._view_sent = True
+        self._view_outdated = False
+        c = self._canvas
+        self._send(("view", c.canvasx(0), c.canvasy(0), c.winfo_width(), c.winfo_height()))
+
+    def scroll_start(self, event):
+        self._canvas.scan_mark(event.x, event.y)
+
+    def scroll_move(self, event):
+        self._canvas.scan_dragto(event.x, event.y, gain=1)
+        self._send_view()
+
+    def _on_mousewheel(self, event):
+        factor = ZOOM_STEP ** (event.delta / 120)
+        self._send(("zoom", factor, self._canvas.canvasx(event.x), self._canvas.canvasy(event.y)))
+
+    def _send_pointer(self, kind, event):
+        # dragging happens in the script process (which has the objects), see CommandInterpretter.pointer_press()
+        self._send((kind, self._canvas.canvasx(event.x), self._canvas.canvasy(event.y)))
+
+    def _poll(self):
+        """Replays the frames the script process sent (restarts the process if it died)."""
+        try:
+            while self._connection.poll():
+                commands, name = self._connection.recv()
+                self._replay(commands, self._geometry(name))
+                self._connection.send(("ack",)) # (the process can reuse the shared memory now)
+                self._view_sent = False
+                if self._view_outdated:
+                    self._send_view()
+        except (EOFError, BrokenPipeError, OSError):
+            print("The script process exited, restarting it")
+            self.stop()
+        finally:
+            self._canvas.after(POLL_INTERVAL, self._poll)
+
+    def _geometry(self, name):
+        """The float64 array in the shared memory block 'name' (blocks that the process replaced are closed)."""
+        if name not in self._shared:
+            for shared in self._shared.values():
+                shared.close()
+            self._shared = {name: shared_memory.SharedMemory(name)}
+        shared = self._shared[name]
+        return np.ndarray(shared.size // 8, dtype=np.float64, buffer=shared.buf)
+
+    def _target(self, tag):
+        """The canvas item/tag for a script process item id/tag."""
+        return self._items[tag] if isinstance(tag, int) else tag
+
+    def _replay(self, commands, geometry):
+        canvas = self._canvas
+        items = self._items
+        target = self._target
+        create = {
+            "line": canvas.create_line,
+            "polygon": canvas.create_polygon,
+            "oval": canvas.create_oval,
+            "text": canvas.create_text,
+        }
+        for command in commands:
+            op = command[0]
+            if op == streamcanvas.CREATE:
+                _, kind, item, offset, count, options = command
+                items[item] = create[kind](geometry[offset:offset + count].tolist(), **options)
+            elif op == streamcanvas.COORDS:
+                _, item, offset, count = command
+                canvas.coords(target(item), *geometry[offset:offset + count].tolist())
+            elif op == streamcanvas.ITEMCONFIG:
+                canvas.itemconfig(target(command[1]), **command[2])
+            elif op == streamcanvas.DELETE:
+                canvas.delete(*[items.pop(item) for item in command[1] if item in items])
+            elif op == streamcanvas.SCALE:
+                canvas.scale(target(command[1]), *command[2:])
+            elif op == streamcanvas.MOVE:
+                canvas.move(target(command[1]), *command[2:])
+            elif op == streamcanvas.LOWER:
+                if command[2] is None:
+                    canvas.tag_lower(target(command[1]))
+                else:
+                    canvas.tag_lower(target(command[1]), target(command[2]))
+            elif op == streamcanvas.RAISE:
+                if command[2] is None:
+                    canvas.tag_raise(target(command[1]))
+                else:
+                    canvas.tag_raise(target(command[1]), target(command[2]))
+
+def _serve(connection):
+    """Main loop of the script process: runs the scripts and view changes sent through 'connection', and sends back
+    what changed on the canvas (at most one frame in flight; changes made meanwhile go into the next frame).
+    """
+    from commandinterpretter import CommandInterpretter
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit()) # (terminate() at exit then still frees the shared memory)
+    canvas = StreamCanvas()
+    command_interpretter = CommandInterpretter(canvas)
+    waiting = False # a frame was sent and not acknowledged yet
+    reply = False # a frame has to be sent even if nothing changed (the window waits for one after a view change)
+    try:
+        while True:
+            if connection.poll(canvas.next_due()):
+                message = connection.recv()
+                kind = message[0]
+                if kind == "ack":
+                    waiting = False
+                elif kind == "view":
+                    canvas.set_view(*message[1:])
+                    command_interpretter._on_view_changed()
+                    reply = True
+                elif kind == "zoom":
+                    command_interpretter.zoom(*message[1:])
+                elif kind == "press":
+                    command_interpretter.pointer_press(*message[1:])
+                elif kind == "move":
+                    command_interpretter.pointer_move(*message[1:])
+                elif kind == "release":
+                    command_interpretter.pointer_release(*message[1:])
+                else:
+                    try:
+                        if kind == "execute":
+                            command_interpretter.execute_script(message[1], message[2])
+                        else:
+                            command_interpretter.execute_commands_immediate(message[1])
+                    except Exception:
+                        traceback.print_exc()
+            canvas.run_pending()
+
+            if not waiting and (reply or canvas.has_changes()):
+                connection.send(canvas.take_frame())
+                waiting = True
+                reply = False
+    except (EOFError, BrokenPipeError, OSError):
+        pass # the window was closed
+    finally:
+        canvas.close()
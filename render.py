@@ -0,0 +1,21 @@
+import argparse
+
+
+description = """Runs a script without a window (no display needed) and saves the resulting scene as a PNG or SVG image."""
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("script", help="the script to run (the same kind of code you would type in the script window)")
+    parser.add_argument("-o", "--output", required=True, help="the image file to create (.png or .svg)")
+    parser.add_argument("--width", type=int, default=800, help="width of the image, in pixels")
+    parser.add_argument("--height", type=int, default=600, help="height of the image, in pixels")
+    args = parser.parse_args()
+
+    from headlesscanvas import HeadlessCanvas
+    from commandinterpretter import CommandInterpretter
+
+    canvas = HeadlessCanvas(args.width, args.height)
+    command_interpretter = CommandInterpretter(canvas)
+    with open(args.script, "r") as f:
+        command_interpretter.execute_script(f.read())
+    canvas.save(args.output)
@@ -0,0 +1,95 @@
+import math
+
+class SpatialIndex:
+    """A uniform grid over 2d space that quickly finds which of its rectangles intersect a given rectangle.
+
+    Rectangles are (xmin, ymin, xmax, ymax) tuples, stored by key (any hashable). Rectangles that would cover a lot of
+    cells are kept in a separate list that is always checked (so huge objects don't fill up the grid).
+    """
+
+    MAX_CELLS = 64 # max number of cells a rectangle can be put in
+
+    def __init__(self, cell_size):
+        self._cell_size = cell_size
+        self._rects = {} # key -> rect
+        self._cells = {} # (column, row) -> set of keys
+        self._large = set() # keys of rectangles that cover more than MAX_CELLS cells
+
+    def _cell_range(self, rect):
+        """Returns the (first column, last column, first row, last row) of the cells that 'rect' overlaps."""
+        s = self._cell_size
+        return (
+            math.floor(rect[0] / s),
+            math.floor(rect[2] / s),
+            math.floor(rect[1] / s),
+            math.floor(rect[3] / s),
+        )
+
+    def insert(self, key, rect):
+        """Adds (or moves) the rectangle 'rect' with the given key."""
+        if key in self._rects:
+            self.remove(key)
+        self._rects[key] = rect
+
+        c0, c1, r0, r1 = self._cell_range(rect)
+        if (c1 - c0 + 1) * (r1 - r0 + 1) > SpatialIndex.MAX_CELLS:
+            self._large.add(key)
+            return
+        for c in range(c0, c1 + 1):
+            for r in range(r0, r1 + 1):
+                self._cells.setdefault((c, r), set()).add(key)
+
+    def remove(self, key):
+        """Removes the rectangle with the given key (if there is one)."""
+        rect = self._rects.pop(key, None)
+        if rect is None:
+            return
+        if key in self._large:
+            self._large.discard(key)
+            return
+
+        c0, c1, r0, r1 = self._cell_range(rect)
+        for c in range(c0, c1 + 1):
+            for r in range(r0, r1 + 1):
+                cell = self._cells[(c, r)]
+                cell.discard(key)
+                if not cell:
+                    del self._cells[(c, r)]
+
+    def query(self, rect):
+        """Returns the set of keys whose rectangles intersect 'rect'."""
+        c0, c1, r0, r1 = self._cell_range(rect)
+
+        # if the query covers more cells than there are rectangles, checking every rectangle is faster
+        if (c1 - c0 + 1) * (r1 - r0 + 1) > len(self._rects):
+            candidates = self._rects.keys()
+        else:
+            candidates = set(self._large)
+            for c in range(c0, c1 + 1):
+                for r in range(r0, r1 + 1):
+                    cell = self._cells.get((c, r))
+                    if cell:
+                        candidates.update(cell)
+
+        xmin, ymin, xmax, ymax = rect
+        result = set()
+        for key in candidates:
+            r = self._rects[key]
+            if r[0] <= xmax and r[2] >= xmin and r[1] <= ymax and r[3] >= ymin:
+                result.add(key)
+        return result
+
+    def get(self, key):
+        """Returns the rectangle with the given key."""
+        return self._rects[key]
+
+    def clear(self):
+        self._rects.clear()
+        self._cells.clear()
+        self._large.clear()
+
+    def __contains__(self, key):
+        return key in self._rects
+
+    def __len__(self):
+        return len(self._rects)
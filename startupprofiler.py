@@ -0,0 +1,78 @@
+import builtins
+import contextlib
+import importlib.util
+import sys
+import threading
+import time
+
+REPORTED_IMPORTS = 25 # number of (slowest) imports listed in the report
+
+class StartupProfiler:
+    """Measures what startup spends its time on (used by 'main.py --profile-startup').
+
+    While installed, every import on the main thread that actually loads a module is timed (by wrapping
+    builtins.__import__), both including and excluding the imports it does itself. Initialization steps are timed by
+    wrapping them in 'with profiler.phase(name):'. Imports on other threads (e.g. jedi, which is loaded in the
+    background) don't delay the window, so they aren't counted.
+    """
+
+    def __init__(self):
+        self._start = time.perf_counter()
+        self._imports = [] # (module name, seconds, seconds excluding nested imports) of the finished imports
+        self._phases = [] # (name, seconds) of the finished phases
+        self._nested = [] # seconds spent in nested imports, for each import in progress (innermost last)
+        self._original_import = None
+
+    def install(self):
+        """Starts timing imports."""
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+
+    def uninstall(self):
+        """Stops timing imports."""
+        builtins.__import__ = self._original_import
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if threading.current_thread() is not threading.main_thread():
+            return self._original_import(name, globals, locals, fromlist, level)
+        loaded = len(sys.modules)
+        self._nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            duration = time.perf_counter() - start
+            nested = self._nested.pop()
+            if self._nested:
+                self._nested[-1] += duration
+            if len(sys.modules) > loaded: # (imports of modules that are already loaded, most of them, aren't listed)
+                self._imports.append((StartupProfiler._module_name(name, globals, fromlist, level), duration, duration - nested))
+
+    @staticmethod
+    def _module_name(name, globals, fromlist, level):
+        """The absolute name of the module an import statement imports ('a.b' for 'from . import b' in package 'a')."""
+        if not level:
+            return name
+        package = importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__") or "")
+        return package if name or not fromlist else f"{package}.{fromlist[0]}"
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Times the code in the 'with' block as the initialization step 'name'."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._phases.append((name, time.perf_counter() - start))
+
+    def report(self):
+        """Prints the time of each phase and of the slowest imports."""
+        print(f"startup took {(time.perf_counter() - self._start) * 1000:.0f} ms")
+        print()
+        print(f"{'phase':<40}{'ms':>10}")
+        for name, duration in self._phases:
+            print(f"{name:<40}{duration * 1000:>10.1f}")
+        print()
+        print(f"{'import':<40}{'ms':>10}{'self ms':>10}")
+        for name, duration, own in sorted(self._imports, key=lambda i: i[1], reverse=True)[:REPORTED_IMPORTS]:
+            print(f"{name[:39]:<40}{duration * 1000:>10.1f}{own * 1000:>10.1f}")
@@ -0,0 +1,122 @@
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from headlesscanvas import HeadlessCanvas
+
+# draw commands (the first element of each command tuple)
+CREATE = 0 # (CREATE, kind, item, offset, count, options)
+COORDS = 1 # (COORDS, item, offset, count)
+ITEMCONFIG = 2 # (ITEMCONFIG, tag, options)
+DELETE = 3 # (DELETE, items)
+SCALE = 4 # (SCALE, tag, x_origin, y_origin, x_scale, y_scale)
+MOVE = 5 # (MOVE, tag, dx, dy)
+LOWER = 6 # (LOWER, tag, below)
+RAISE = 7 # (RAISE, tag, above)
+
+MIN_GEOMETRY_SIZE = 1 << 16 # smallest shared memory block, in bytes
+
+class StreamCanvas(HeadlessCanvas):
+    """A HeadlessCanvas that also records the changes made to it as a stream of draw commands (used by the script
+    process of a RemoteInterpretter, which replays them on the real canvas).
+
+    Commands are small tuples; the coordinates they refer to are collected into one float array per frame, published
+    through a shared memory block (commands just hold the offset and count of their coordinates in it).
+    """
+
+    def __init__(self, width=800, height=600, background="#ffffff"):
+        super().__init__(width, height, background)
+        self._commands = [] # commands recorded since the last take_frame()
+        self._geometry = [] # coordinates of those commands, flattened
+        self._shared = None # the shared memory block of the last frame
+
+    def set_view(self, left, top, width, height):
+        """Sets the area of the canvas that the (real) window shows."""
+        self._scroll = (left, top)
+        self._width = width
+        self._height = height
+
+    def next_due(self):
+        """Seconds until the next after() callback is due (None if there are none)."""
+        if not self._pending:
+            return None
+        return max(min(when for when, _, _ in self._pending.values()) - time.monotonic(), 0)
+
+    def has_changes(self):
+        return bool(self._commands)
+
+    def take_frame(self):
+        """Returns the commands recorded since the last call, and the name of the shared memory block that holds their
+        coordinates (as float64s). The block is reused by the next frame, so the reader has to be done with it by then.
+        """
+        geometry = np.array(self._geometry, dtype=np.float64)
+        if self._shared is None or self._shared.size < geometry.nbytes:
+            self.close()
+            self._shared = shared_memory.SharedMemory(create=True, size=max(geometry.nbytes * 2, MIN_GEOMETRY_SIZE))
+        np.ndarray(geometry.shape, dtype=np.float64, buffer=self._shared.buf)[:] = geometry
+
+        commands = self._commands
+        self._commands = []
+        self._geometry = []
+        return commands, self._shared.name
+
+    def close(self):
+        """Frees the shared memory block."""
+        if self._shared is not None:
+            self._shared.close()
+            self._shared.unlink()
+            self._shared = None
+
+    def _add_geometry(self, coords):
+        """Appends 'coords' to the frame's coordinates, returns their (offset, count)."""
+        offset = len(self._geometry)
+        self._geometry += coords
+        return offset, len(coords)
+
+    def _target(self, tag):
+        return int(tag) if isinstance(tag, str) and tag.isdigit() else tag
+
+    def _create(self, kind, args, options):
+        item = super()._create(kind, args, options)
+        _, coords, options, tags = self._items[item]
+        self._commands.append((CREATE, kind, item) + self._add_geometry(coords) + (dict(options, tags=tags),))
+        return item
+
+    def coords(self, item, *args):
+        result = super().coords(item, *args)
+        if args:
+            found = self._find(item)
+            if found:
+                self._commands.append((COORDS, found[0]) + self._add_geometry(result))
+        return result
+
+    def itemconfig(self, tag, **options):
+        super().itemconfig(tag, **options)
+        self._commands.append((ITEMCONFIG, self._target(tag), options))
+
+    itemconfigure = itemconfig
+
+    def delete(self, *tags):
+        # the deleted items are listed by id, so that the reader can forget them
+        items = [item for tag in tags for item in self._find(tag)]
+        super().delete(*tags)
+        if items:
+            self._commands.append((DELETE, items))
+
+    def scale(self, tag, x_origin, y_origin, x_scale, y_scale):
+        super().scale(tag, x_origin, y_origin, x_scale, y_scale)
+        self._commands.append((SCALE, self._target(tag), x_origin, y_origin, x_scale, y_scale))
+
+    def move(self, tag, dx, dy):
+        super().move(tag, dx, dy)
+        self._commands.append((MOVE, self._target(tag), dx, dy))
+
+    def tag_lower(self, tag, below=None):
+        super().tag_lower(tag, below)
+        self._commands.append((LOWER, self._target(tag), self._target(below)))
+
+    def tag_raise(self, tag, above=None):
+        super().tag_raise(tag, above)
+        self._commands.append((RAISE, self._target(tag), self._target(above)))
+
+    lower = tag_lower
+    lift = tag_raise
@@ -29,12 +29,38 @@ def clear(*objects):
     for obj in objects:
         obj.clear()
 
+def stats():
+    """Returns a dict that describes what the scene holds:
+    - 'drawn objects': number of drawn MathObjects, by class
+    - 'existing objects': number of MathObjects that exist (drawn or not, e.g. temporary results), by class
+    - 'canvas items': number of canvas items, by the class of the object that owns them
+    - 'grid items': number of canvas items of the grid (and the profiler overlay)
+    - 'orphaned items': canvas items that no drawn object owns (which points to a bug)
+    - 'missing items': canvas items that objects think they have, but the canvas doesn't
+    - 'objects in view': number of drawn objects that are in view (have canvas items)
+    - 'geometry bytes': approximate memory used by the points, etc of the drawn objects, by class
+    """
+    import config
+    return config.command_interpretter.stats()
+
+def save_trace(path, seconds=10):
+    """Saves what the last 'seconds' seconds of frames spent their time on (needs options.profile = True) as a Chrome
+    trace file (open it in chrome://tracing or https://ui.perfetto.dev).
+    """
+    import config
+    return config.command_interpretter.profiler.save_trace(path, seconds)
+
 class _Options:
     def __init__(self):
         import config
         self._command_interpretter = config.command_interpretter
 
         self._grid_visible = True
+        self._immediate_redraw = False
+        self._profile = False
+        self._watch_growth = False
+        self._lod_tolerance = config.LOD_TOLERANCE
+        self._dragging = True
 
     @property
     def grid(self):
@@ -45,4 +71,56 @@ class _Options:
         self._grid_visible = value
         self._command_interpretter.show_grid = value
 
+    @property
+    def immediate_redraw(self):
+        return self._immediate_redraw
+
+    @immediate_redraw.setter
+    def immediate_redraw(self, value):
+        self._immediate_redraw = value
+        self._command_interpretter.immediate_redraw = value
+
+    @property
+    def watch_growth(self):
+        return self._watch_growth
+
+    @watch_growth.setter
+    def watch_growth(self, value):
+        """Prints a warning when the number of drawn objects or canvas items keeps growing while the script animates."""
+        self._watch_growth = value
+        self._command_interpretter.watch_growth = value
+
+    @property
+    def dragging(self):
+        return self._dragging
+
+    @dragging.setter
+    def dragging(self, value):
+        """Whether Points, the tips of Vectors and the vertices of Polygons can be dragged with the left mouse button."""
+        self._dragging = value
+        self._command_interpretter.drag_handles.enabled = value
+
+    @property
+    def lod_tolerance(self):
+        return self._lod_tolerance
+
+    @lod_tolerance.setter
+    def lod_tolerance(self, value):
+        """Long polylines and polygons skip vertices that are closer together than this many pixels on screen (0 draws every vertex)."""
+        self._lod_tolerance = value
+        self._command_interpretter.lod_tolerance = value
+
+    @property
+    def profile(self):
+        return self._profile
+
+    @profile.setter
+    def profile(self, value):
+        """Times each frame, and shows the FPS and how long each part of a frame takes on the canvas (see save_trace())."""
+        self._profile = value
+        profiler = self._command_interpretter.profiler
+        profiler.enabled = value
+        profiler.show_overlay = value
+        profiler.draw_overlay(self._command_interpretter._canvas)
+
 options = _Options()
@@ -1,5 +1,5 @@
+import math
 import numpy as np
-import config
 from config import LABEL_FONT
 from mathobject import MathObject
 import tkinter as tk
@@ -7,6 +7,10 @@ import tkinter as tk
 class Vector(MathObject):
     """A 2d vector."""
 
+    __slots__ = ("_vector", "_magnitude", "_angle", "draw_label_at_end", "position")
+
+    DRAGGABLE = True
+
     @staticmethod
     def from_angle_and_magnitude(angle, magnitude):
         """Create a vector from an angle and magnitude.
@@ -24,42 +28,56 @@ class Vector(MathObject):
         self._vector = (dx, dy)
         self._label = label
         self.draw_label_at_end = False  # draw the label at end (or mid-point)
-        self._magnitude = np.sqrt(dx**2 + dy**2)
-        self._angle = np.arctan2(dy, dx)
+        self._magnitude = None # computed lazily (see magnitude property)
+        self._angle = None # in radians, computed lazily (see angle property)
         self.position = (0,0) # position of the vector's tail
 
-    def draw(self):
-        super().draw()
-
-        from affinet import AffineT # import here to avoid circular import
-
-        offsetT = AffineT.translation(self.position[0],self.position[1])
-        pt1transformed = config.command_interpretter.initial_transform * offsetT * Vector(0, 0)
-        pt2transformed = config.command_interpretter.initial_transform * offsetT * Vector(self._vector[0], self._vector[1])
+    def _render(self):
+        transform = self._screen_transform()
+        px, py = self.position
+        pt1transformed = transform._apply_point(px, py)
+        pt2transformed = transform._apply_point(px + self._vector[0], py + self._vector[1])
         l = self._canvas.create_line(
             pt1transformed[0],
             pt1transformed[1],
             pt2transformed[0],
             pt2transformed[1],
             arrow=tk.LAST,
-            fill=self._color,
+            fill=self.color,
             width=self.line_width
         )
         self._canvas_items.append(l)
 
         if self._label is not None:
-            text_x = self._vector[0] if self.draw_label_at_end else self._vector[0] / 2
-            text_y = self._vector[1] if self.draw_label_at_end else self._vector[1] / 2
-            pt2transformed = config.command_interpretter.initial_transform * Vector(text_x, text_y)
+            text_x = px + (self._vector[0] if self.draw_label_at_end else self._vector[0] / 2)
+            text_y = py + (self._vector[1] if self.draw_label_at_end else self._vector[1] / 2)
+            pt2transformed = transform._apply_point(text_x, text_y)
             t = self._canvas.create_text(
                 pt2transformed[0],
                 pt2transformed[1],
                 text=self._label,
                 font=LABEL_FONT,
-                fill=self._color,
+                fill=self.color,
             )
             self._canvas_items.append(t)
 
+    def _handles(self):
+        # the tip
+        px, py = self.position
+        return ((px + self._vector[0], py + self._vector[1]),)
+
+    def _drag_handle(self, handle, x, y):
+        px, py = self.position
+        self._vector = (x - px, y - py)
+        self._magnitude = None
+        self._angle = None
+        self._invalidate()
+
+    def _compute_bounds(self):
+        px, py = self.position
+        x2, y2 = px + self._vector[0], py + self._vector[1]
+        return (min(px, x2), min(py, y2), max(px, x2), max(py, y2))
+
     @property
     def dx(self):
         return self._vector[0]
@@ -70,23 +88,33 @@ class Vector(MathObject):
 
     @property
     def magnitude(self):
+        if self._magnitude is None:
+            self._magnitude = math.hypot(self._vector[0], self._vector[1])
         return self._magnitude
     
     @magnitude.setter
     def magnitude(self, magnitude):
+        angle = self._radians()
         self._magnitude = magnitude
-        self._vector = (self._magnitude * np.cos(self._angle), self._magnitude * np.sin(self._angle))
-        self.redraw()
+        self._vector = (magnitude * math.cos(angle), magnitude * math.sin(angle))
+        self._invalidate()
+
+    def _radians(self):
+        """The angle of the vector in radians."""
+        if self._angle is None:
+            self._angle = math.atan2(self._vector[1], self._vector[0])
+        return self._angle
 
     @property
     def angle(self):
-        return np.degrees(self._angle)
+        return math.degrees(self._radians())
 
     @angle.setter
     def angle(self, angle):
-        self._angle = np.radians(angle)
-        self._vector = (self._magnitude * np.cos(self._angle), self._magnitude * np.sin(self._angle))
-        self.redraw()
+        magnitude = self.magnitude
+        self._angle = math.radians(angle)
+        self._vector = (magnitude * math.cos(self._angle), magnitude * math.sin(self._angle))
+        self._invalidate()
 
     def copy(self):
         newv = Vector(self._vector[0], self._vector[1])
@@ -0,0 +1,193 @@
+from mathobject import MathObject
+from config import LABEL_FONT
+from vector import Vector
+from pointbuffer import PointBuffer
+import numpy as np
+import tkinter as tk
+
+class VectorArray(MathObject):
+    """Many 2d vectors, stored as numpy arrays (components, tail positions and optional per-vector colors).
+
+    Behaves like one object: it has one entry in the scene and supports vectorized arithmetic (so fields of thousands
+    of arrows stay fast). Use it instead of many Vectors. Drawing transforms all vectors at once, but still creates one
+    canvas item per arrow (Tk has no item that draws many separate shapes), so it mostly saves the overhead of
+    separate objects.
+    """
+
+    __slots__ = ("_components", "_positions", "_colors")
+
+    __array_ufunc__ = None # so that e.g. 'array * vectors' uses VectorArray.__rmul__ instead of numpy broadcasting
+
+    def __init__(self, components, positions=None, colors=None, label=None):
+        """'components' are the (dx,dy) of the vectors and 'positions' the (x,y) of their tails (default (0,0)), each as an
+        (N,2) array or a sequence of pairs. 'colors' is an optional color per vector (color strings, or an (N,3) array
+        of 0-255 RGB values); by default all vectors have the object's color.
+        """
+        super().__init__()
+        self._components = PointBuffer.as_array(components).copy()
+        self._positions = np.zeros_like(self._components) if positions is None else self._as_pairs(positions)
+        self._colors = None if colors is None else MathObject._color_array(colors, len(self._components))
+        self._label = label
+
+    def _as_pairs(self, values):
+        """Converts 'values' (an (N,2) array, a sequence of pairs or a single pair) to an (N,2) array (N = number of vectors)."""
+        array = np.array(values, dtype=np.float64)
+        if array.shape == (2,):
+            array = np.tile(array, (len(self._components), 1))
+        if array.shape != self._components.shape:
+            raise ValueError(f"expected {len(self._components)} (x,y) pairs, got an array of shape {array.shape}")
+        return array
+
+    def _with(self, components=None, positions=None):
+        """Returns a new VectorArray with the same colors (and, unless given, the same components/positions)."""
+        result = VectorArray(self._components if components is None else components, self._positions if positions is None else positions)
+        result._colors = self._colors
+        return result
+
+    def copy(self):
+        return self._with()
+
+    @property
+    def components(self):
+        """The (dx,dy) of the vectors, as an (N,2) array."""
+        return self._components
+
+    @components.setter
+    def components(self, value):
+        self._components = PointBuffer.as_array(value).copy()
+        if len(self._positions) != len(self._components):
+            self._positions = np.zeros_like(self._components)
+            self._colors = None
+        self._invalidate()
+
+    @property
+    def positions(self):
+        """The (x,y) of the vectors' tails, as an (N,2) array."""
+        return self._positions
+
+    @positions.setter
+    def positions(self, value):
+        self._positions = self._as_pairs(value)
+        self._invalidate()
+
+    @property
+    def colors(self):
+        return self._colors
+
+    @colors.setter
+    def colors(self, value):
+        self._colors = None if value is None else MathObject._color_array(value, len(self._components))
+        self._invalidate()
+
+    @property
+    def magnitudes(self):
+        return np.hypot(self._components[:, 0], self._components[:, 1])
+
+    @property
+    def angles(self):
+        """The angles of the vectors, in degrees."""
+        return np.degrees(np.arctan2(self._components[:, 1], self._components[:, 0]))
+
+    def normalized(self):
+        """Returns the vectors scaled to length 1 (zero vectors stay zero)."""
+        magnitudes = self.magnitudes
+        magnitudes[magnitudes == 0] = 1
+        return self._with(self._components / magnitudes[:, None])
+
+    def dot(self, other):
+        """Dot products with a Vector or another VectorArray (element by element). Returns an (N,) array."""
+        other = self._other_components(other)
+        return self._components[:, 0] * other[..., 0] + self._components[:, 1] * other[..., 1]
+
+    def _other_components(self, other):
+        if isinstance(other, VectorArray):
+            return other._components
+        if isinstance(other, Vector):
+            return np.array(other._vector, dtype=np.float64)
+        return np.asarray(other, dtype=np.float64)
+
+    def __len__(self):
+        return len(self._components)
+
+    def __getitem__(self, key):
+        """An int gives a Vector (at its position); a slice, index array or boolean mask gives a VectorArray."""
+        if isinstance(key, (int, np.integer)):
+            v = Vector(*self._components[key].tolist())
+            v.position = tuple(self._positions[key].tolist())
+            if self._colors is not None:
+                v._color = str(self._colors[key])
+            return v
+        result = VectorArray(self._components[key], self._positions[key])
+        result._colors = None if self._colors is None else self._colors[key]
+        return result
+
+    def __add__(self, other):
+        # adds a Vector, a VectorArray or an (N,2) array to the components (the tails stay where they are)
+        if isinstance(other, (VectorArray, Vector, np.ndarray)):
+            return self._with(self._components + self._other_components(other))
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, (VectorArray, Vector, np.ndarray)):
+            return self._with(self._components - self._other_components(other))
+        return NotImplemented
+
+    def __neg__(self):
+        return self._with(-self._components)
+
+    def __mul__(self, other):
+        # scales the vectors by a number, or each vector by its own number (an (N,) array)
+        if isinstance(other, (int, float, np.number)):
+            return self._with(self._components * other)
+        if isinstance(other, np.ndarray) and other.shape == (len(self._components),):
+            return self._with(self._components * other[:, None])
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def _compute_bounds(self):
+        if len(self._components) == 0:
+            return None
+        ends = np.vstack((self._positions, self._positions + self._components))
+        return tuple(ends.min(axis=0).tolist() + ends.max(axis=0).tolist())
+
+    def _release(self):
+        if self._materialized:
+            self._canvas.delete(self._tag())
+        super()._release()
+
+    def _owned_items(self):
+        items = super()._owned_items()
+        if self._materialized:
+            items += self._canvas.find_withtag(self._tag())
+        return items
+
+    def _geometry_bytes(self):
+        return self._components.nbytes + self._positions.nbytes + (0 if self._colors is None else self._colors.nbytes)
+
+    def _tag(self):
+        """Canvas tag of the arrows (they are deleted with one call)."""
+        return f"mathobject{id(self)}"
+
+    def _render(self):
+        n = len(self._components)
+        if n == 0:
+            return
+
+        transform = self._screen_transform()
+        tails = transform._apply_array(self._positions).tolist()
+        tips = transform._apply_array(self._positions + self._components).tolist()
+        colors = [self.color] * n if self._colors is None else self._colors.tolist()
+
+        create_line = self._canvas.create_line
+        tag = self._tag()
+        width = self.line_width
+        for (x0, y0), (x1, y1), color in zip(tails, tips, colors):
+            create_line(x0, y0, x1, y1, arrow=tk.LAST, fill=color, width=width, tags=tag)
+
+        if self._label is not None:
+            x, y = transform._apply_point(*(self._positions + self._components / 2).mean(axis=0).tolist())
+            t = self._canvas.create_text(x, y, text=self._label, font=LABEL_FONT, fill=self.color)
+            self._canvas_items.append(t)